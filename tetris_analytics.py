@@ -0,0 +1,235 @@
+import os
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from tetris_main import PIECE_TYPES, SPIN_CODES, SpinType, BOARD_WIDTH, TOTAL_HEIGHT
+from tetris_replay import ReplayError, archive_paths, iter_replays, replay_board, simulate
+
+MAX_COMBO = 20  # longer combos share the last bucket
+COLUMN_OFFSET = 2  # piece x positions can be left of the board; columns are stored shifted by this
+CHUNK_PLACEMENTS = 16384  # placements buffered per player before they are added to the arrays
+
+PIECE_INDEX = {piece_type: i for i, piece_type in enumerate(PIECE_TYPES)}
+SPIN_NAMES = {code: spin.value for spin, code in SPIN_CODES.items()}
+
+# Key of a player's results; boards of other sizes are counted separately
+PlayerKey = Tuple[str, int, int]  # (player, width, height)
+
+class PlayerStats:
+    """Aggregate counts for one player and board size; merging two is adding their arrays"""
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.games = 0
+        self.deaths = 0
+        self.pieces = 0
+        self.attack = 0
+        self.errors = 0
+        # Times each cell was filled, sampled after every placement
+        self.occupancy = np.zeros((height, width), dtype=np.int64)
+        # Locks per piece type, rotation and column (x + COLUMN_OFFSET)
+        self.placements = np.zeros((len(PIECE_TYPES), 4, width + 2 * COLUMN_OFFSET), dtype=np.int64)
+        # Placements per spin code and lines cleared
+        self.clears = np.zeros((len(SPIN_CODES), 5), dtype=np.int64)
+        # Line clears by how many clears came right before them (0 for no combo),
+        # the count calculate_attack gives the combo bonus for
+        self.combos = np.zeros(MAX_COMBO + 1, dtype=np.int64)
+        # Topped-out games by stack height at death
+        self.death_heights = np.zeros(height + 1, dtype=np.int64)
+        
+        self.pending = Buffer()
+    
+    def merge(self, other: "PlayerStats"):
+        other.flush()
+        self.flush()
+        self.games += other.games
+        self.deaths += other.deaths
+        self.pieces += other.pieces
+        self.attack += other.attack
+        self.errors += other.errors
+        self.occupancy += other.occupancy
+        self.placements += other.placements
+        self.clears += other.clears
+        self.combos += other.combos
+        self.death_heights += other.death_heights
+    
+    def flush(self):
+        """Add the buffered placements to the arrays in one vectorized pass"""
+        buffer = self.pending
+        if not buffer.pieces:
+            return
+        
+        cells = np.frombuffer(b"".join(buffer.boards), dtype=np.uint8)
+        self.occupancy += cells.reshape(-1, self.height, self.width).sum(axis=0, dtype=np.int64)
+        
+        columns = np.clip(np.asarray(buffer.columns) + COLUMN_OFFSET, 0, self.placements.shape[2] - 1)
+        index = np.ravel_multi_index((buffer.pieces, buffer.rotations, columns), self.placements.shape)
+        self.placements += np.bincount(index, minlength=self.placements.size).reshape(self.placements.shape)
+        
+        index = np.ravel_multi_index((buffer.spins, buffer.lines), self.clears.shape)
+        self.clears += np.bincount(index, minlength=self.clears.size).reshape(self.clears.shape)
+        
+        lines = np.asarray(buffer.lines)
+        combos = np.minimum(np.asarray(buffer.combo_counts)[lines > 0], MAX_COMBO)
+        self.combos += np.bincount(combos, minlength=MAX_COMBO + 1)
+        
+        self.pending = Buffer()
+    
+    def __getstate__(self):
+        # Workers send finished results only; nothing is left buffered
+        self.flush()
+        state = dict(self.__dict__)
+        del state["pending"]
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.pending = Buffer()
+    
+    def summary(self) -> Dict:
+        clears = self.clears
+        cleared = int(clears[:, 1:].sum())
+        deaths = self.death_heights
+        return {
+            "games": self.games,
+            "pieces": self.pieces,
+            "attack_per_piece": self.attack / self.pieces if self.pieces else 0.0,
+            "deaths": self.deaths,
+            "mean_death_height": float(deaths @ np.arange(len(deaths)) / self.deaths) if self.deaths else None,
+            "clear_rate": cleared / self.pieces if self.pieces else 0.0,
+            "spin_rates": {SPIN_NAMES[code]: int(clears[code, 1:].sum()) / cleared if cleared else 0.0
+                           for code in SPIN_NAMES if code != SPIN_CODES[SpinType.NONE]},
+            "combo_rate": int(self.combos[1:].sum()) / cleared if cleared else 0.0,
+            "max_combo": int(np.flatnonzero(self.combos).max()) if self.combos.any() else 0
+        }
+
+class Buffer:
+    """Per-placement values waiting for the next flush"""
+    def __init__(self):
+        self.boards: List[bytes] = []
+        self.pieces: List[int] = []
+        self.rotations: List[int] = []
+        self.columns: List[int] = []
+        self.spins: List[int] = []
+        self.lines: List[int] = []
+        self.combo_counts: List[int] = []
+
+def add_game(stats: PlayerStats, replay: Dict):
+    """Re-simulate one game, buffering each placement and recording how it ended"""
+    board = replay_board(replay)
+    buffer = stats.pending
+    # Rows are only replaced when they change, so each one is converted once;
+    # keeping the row alive alongside its cells stops its id being reused
+    cells = {}
+    
+    def row_cells(row: tuple) -> bytes:
+        found = cells.get(id(row))
+        if found is None:
+            found = cells[id(row)] = (row, bytes(cell is not None for cell in row))
+        return found[1]
+    
+    stats.games += 1
+    try:
+        for step in simulate(replay, board):
+            piece_type, rotation, x, y, held = step.placement
+            buffer.boards.append(b"".join(map(row_cells, board.rows)))
+            buffer.pieces.append(PIECE_INDEX[piece_type])
+            buffer.rotations.append(rotation)
+            buffer.columns.append(x)
+            buffer.spins.append(SPIN_CODES[step.spin])
+            buffer.lines.append(step.lines)
+            buffer.combo_counts.append(board.combo_count - 1)
+            stats.pieces += 1
+            stats.attack += step.attack
+    except ReplayError:
+        # Keep the placements up to the desync
+        stats.errors += 1
+        return
+    finally:
+        if len(buffer.pieces) >= CHUNK_PLACEMENTS:
+            stats.flush()
+    
+    if replay.get("game_over"):
+        filled = [y for y, fill in enumerate(board.row_fill) if fill]
+        stats.deaths += 1
+        stats.death_heights[filled[-1] + 1 if filled else 0] += 1
+
+def analyze_archive(path: str) -> Dict[PlayerKey, PlayerStats]:
+    """Partial results for one archive, merged with the others by the caller"""
+    results: Dict[PlayerKey, PlayerStats] = {}
+    for replay in iter_replays(path):
+        board_size = (replay.get("width", BOARD_WIDTH), replay.get("height", TOTAL_HEIGHT))
+        key = (replay.get("player") or "unknown",) + board_size
+        if key not in results:
+            results[key] = PlayerStats(*board_size)
+        add_game(results[key], replay)
+    
+    for stats in results.values():
+        stats.flush()
+    return results
+
+def analyze(paths: List[str], workers: Optional[int] = None) -> Dict[PlayerKey, PlayerStats]:
+    """Analyze every archive across a process pool and merge the results per player"""
+    archives = archive_paths(paths)
+    totals: Dict[PlayerKey, PlayerStats] = {}
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for partial in pool.map(analyze_archive, archives):
+            for key, stats in partial.items():
+                if key in totals:
+                    totals[key].merge(stats)
+                else:
+                    totals[key] = stats
+    return totals
+
+def save(totals: Dict[PlayerKey, PlayerStats], path: str):
+    """Every player's arrays in one .npz, named "<player>@<width>x<height>/<array>\""""
+    arrays = {}
+    for (player, width, height), stats in totals.items():
+        prefix = f"{player}@{width}x{height}/"
+        for name in ("occupancy", "placements", "clears", "combos", "death_heights"):
+            arrays[prefix + name] = getattr(stats, name)
+        arrays[prefix + "counts"] = np.array([stats.games, stats.deaths, stats.pieces, stats.attack, stats.errors])
+    np.savez_compressed(path, **arrays)
+
+def print_report(totals: Dict[PlayerKey, PlayerStats]):
+    for (player, width, height), stats in sorted(totals.items()):
+        summary = stats.summary()
+        size = "" if (width, height) == (BOARD_WIDTH, TOTAL_HEIGHT) else f" ({width}x{height})"
+        print(f"{player}{size}: {summary['games']} games, {summary['pieces']} pieces, "
+              f"{summary['attack_per_piece']:.2f} attack/piece")
+        
+        death = summary["mean_death_height"]
+        print(f"  deaths {summary['deaths']}" + (f", mean stack height {death:.1f}" if death is not None else ""))
+        spins = "  ".join(f"{name} {rate:.1%}" for name, rate in summary["spin_rates"].items())
+        print(f"  clears {summary['clear_rate']:.1%} of pieces; spins {spins}; "
+              f"combo clears {summary['combo_rate']:.1%}, longest {summary['max_combo']}")
+        
+        # Most used column for each piece, over all rotations
+        favourites = []
+        for piece_type, counts in zip(PIECE_TYPES, stats.placements):
+            rotation, column = np.unravel_index(counts.argmax(), counts.shape)
+            if counts.any():
+                favourites.append(f"{piece_type} r{rotation} x{column - COLUMN_OFFSET}")
+        print(f"  favourite placements: {', '.join(favourites)}")
+        
+        if stats.errors:
+            print(f"  {stats.errors} games stopped early on a desync")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-player heatmaps and placement statistics from replays")
+    parser.add_argument("archives", nargs="+", help="Replay archives or directories of them")
+    parser.add_argument("--out", help="Save every player's arrays to this .npz file")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: all cores)")
+    args = parser.parse_args()
+    
+    totals = analyze(args.archives, args.workers)
+    print_report(totals)
+    if args.out:
+        save(totals, args.out)
+        print(f"Saved arrays for {len(totals)} players to {args.out}")
@@ -0,0 +1,583 @@
+import os
+# Bots import the shared board helpers from here, and stdout is their protocol channel
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import json
+import queue
+import shlex
+import struct
+import subprocess
+import sys
+import threading
+import time
+import argparse
+from collections import deque
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional, Tuple
+
+from tetris_main import (Board, InputKey, PIECES, PIECE_COLORS, PIECE_TYPES, WALL_KICKS, BOARD_ACTIONS,
+                         BOARD_WIDTH, TOTAL_HEIGHT, NEXT_PREVIEW)
+
+# Line-delimited JSON protocol modelled on the community bot protocols:
+#   bot -> us:  info, ready, suggestion, error
+#   us -> bot:  rules, start, suggest, play, new_piece, stop, quit
+# Locations use Board coordinates: x/y is the origin of the piece's shape box
+# (y grows upwards) and orientation maps rotation 0-3 to the names below.
+ORIENTATIONS = ["north", "east", "south", "west"]
+
+MOVE_TIMEOUT = 10.0  # seconds the game waits for any one reply before the bot counts as stuck
+
+# Shared board layout: header (write counter, width, height) then one byte per
+# cell, row 0 first. The counter is odd while a write is in progress.
+SHM_HEADER = struct.Struct("<IHH")
+EMPTY_CODE = 0
+GARBAGE_CODE = 8
+CELL_CODES = {PIECE_COLORS[t]: i + 1 for i, t in enumerate(PIECE_TYPES)}
+
+# Evaluation weights for the built-in bot
+DEFAULT_WEIGHTS = {
+    "aggregate_height": -0.51,
+    "max_height": -0.05,
+    "holes": -0.36,
+    "bumpiness": -0.18,
+    "lines": 0.76,
+    "tetris": 2.0
+}
+
+# Filled cells of each piece rotation as (dx, dy) offsets from the piece origin
+PIECE_CELLS = {
+    piece_type: [
+        [(x, y) for y, row in enumerate(shape) for x, cell in enumerate(row) if cell]
+        for shape in PIECES[piece_type]
+    ]
+    for piece_type in PIECE_TYPES
+}
+
+# Each piece rotation as (dy, bitmask of its cells in that row) for fast collision tests
+PIECE_ROW_MASKS = {
+    piece_type: [
+        [(dy, sum(1 << dx for dx, cell_dy in cells if cell_dy == dy)) for dy in sorted({dy for _, dy in cells})]
+        for cells in rotations
+    ]
+    for piece_type, rotations in PIECE_CELLS.items()
+}
+WALL_PADDING = 4  # columns of wall either side of the board in padded row masks
+
+# Inputs a bot's placement is reached with, as (key, dx, dy) shifts and
+# (key, direction) rotations; 180s are two clockwise turns
+PATH_SHIFTS = [(InputKey.LEFT, -1, 0), (InputKey.RIGHT, 1, 0), (InputKey.SOFT_DROP, 0, -1)]
+PATH_ROTATIONS = [(InputKey.ROTATE_CW, 1), (InputKey.ROTATE_CCW, -1)]
+
+class BotError(Exception):
+    pass
+
+class SharedBoard:
+    """Publishes the board grid to shared memory, rewriting only changed rows"""
+    def __init__(self, width: int = BOARD_WIDTH, height: int = TOTAL_HEIGHT):
+        self.width = width
+        self.height = height
+        self.shm = shared_memory.SharedMemory(create=True, size=SHM_HEADER.size + width * height)
+        self.counter = 0
+        self._published = [None] * height
+        SHM_HEADER.pack_into(self.shm.buf, 0, self.counter, width, height)
+    
+    @property
+    def name(self) -> str:
+        return self.shm.name
+    
+    def publish(self, board: Board):
+        rows = board.rows
+        buf = self.shm.buf
+        
+        self.counter += 1
+        SHM_HEADER.pack_into(buf, 0, self.counter, self.width, self.height)
+        
+        for y, row in enumerate(rows):
+            # Rows are shared between snapshots, so identity means unchanged
+            if row is self._published[y]:
+                continue
+            
+            offset = SHM_HEADER.size + y * self.width
+            buf[offset:offset + self.width] = bytes(
+                EMPTY_CODE if cell is None else CELL_CODES.get(cell, GARBAGE_CODE)
+                for cell in row
+            )
+            self._published[y] = row
+        
+        self.counter += 1
+        SHM_HEADER.pack_into(buf, 0, self.counter, self.width, self.height)
+    
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+def open_shared_board(name: str) -> shared_memory.SharedMemory:
+    """Attach to a board published by SharedBoard, from the bot's side"""
+    shm = shared_memory.SharedMemory(name=name)
+    # The game owns the segment; stop this process's tracker unlinking it on exit
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+def read_shared_board(shm: shared_memory.SharedMemory) -> List[bytes]:
+    """Consistent copy of a published board, for bots written in Python"""
+    while True:
+        counter, width, height = SHM_HEADER.unpack_from(shm.buf, 0)
+        if counter % 2:
+            continue
+        
+        cells = bytes(shm.buf[SHM_HEADER.size:SHM_HEADER.size + width * height])
+        if SHM_HEADER.unpack_from(shm.buf, 0)[0] == counter:
+            return [cells[y * width:(y + 1) * width] for y in range(height)]
+
+class BotProcess:
+    """External bot speaking the JSON protocol over stdin/stdout"""
+    def __init__(self, command: List[str]):
+        try:
+            self.process = subprocess.Popen(
+                command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                text=True,
+                bufsize=1
+            )
+        except OSError as e:
+            raise BotError(f"Could not start bot: {e}") from e
+        
+        # Replies are read on their own thread, so waiting for one can time out
+        self.lines = queue.Queue()
+        threading.Thread(target=self.read_lines, name="bot-reader", daemon=True).start()
+        
+        try:
+            self.info = self.receive("info", MOVE_TIMEOUT)
+        except BotError:
+            self.close()
+            raise
+    
+    def read_lines(self):
+        try:
+            for line in self.process.stdout:
+                self.lines.put(line)
+        except (OSError, ValueError):
+            pass
+        self.lines.put("")  # end of output
+    
+    def send(self, message: Dict):
+        try:
+            self.process.stdin.write(json.dumps(message, separators=(",", ":")) + "\n")
+            self.process.stdin.flush()
+        except OSError as e:
+            raise BotError("Bot process exited") from e
+    
+    def receive(self, expected: str, timeout: Optional[float] = None) -> Dict:
+        """Wait for the next message, which must be of the expected type"""
+        message = self.try_receive(expected, timeout)
+        if message is None:
+            raise BotError(f"Bot sent no '{expected}' message within {timeout:g} s")
+        return message
+    
+    def try_receive(self, expected: str, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Like receive(), but None if nothing arrives within timeout"""
+        try:
+            line = self.lines.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if not line:
+            # Later calls see the exit too
+            self.lines.put(line)
+            raise BotError("Bot process exited")
+        
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError:
+            raise BotError(f"Bot sent invalid JSON: {line[:80]!r}") from None
+        if message.get("type") == "error":
+            raise BotError(message.get("reason", "Bot reported an error"))
+        if message.get("type") != expected:
+            raise BotError(f"Expected '{expected}' message, got '{message.get('type')}'")
+        return message
+    
+    def close(self):
+        if self.process.poll() is None:
+            try:
+                self.send({"type": "quit"})
+            except BotError:
+                pass
+            try:
+                self.process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+def apply_move(board: Board, move: Dict):
+    """Hold if needed, place the piece at the move's location and lock it"""
+    location = move["location"]
+    piece_type = location["type"]
+    
+    if piece_type != board.current_piece.type:
+        held = board.hold_piece or board.next_pieces[0]
+        if not board.can_hold or held != piece_type:
+            raise BotError(f"Bot played {piece_type}, which is not available")
+        board.hold()
+    
+    path = find_path(board, ORIENTATIONS.index(location["orientation"]), location["x"], location["y"],
+                     move.get("spin", "none"))
+    if path is None:
+        raise BotError(f"Bot played a location its piece can't reach: {location}")
+    
+    # Real inputs, so spins and kicks are judged exactly as for a human
+    for key in path:
+        method, args = BOARD_ACTIONS[key]
+        method(board, *args)
+    board.hard_drop()
+
+def find_path(board: Board, rotation: int, x: int, y: int, spin: str = "none") -> Optional[List[InputKey]]:
+    """Inputs taking the current piece from where it is to rest at a location.
+    
+    Breadth-first over shifts, soft drops and kicked rotations against the
+    current stack. The location drops to where it would land. When a shift
+    also gets there, the last input is a rotation only if that rotation scores
+    the claimed spin; spins are never taken from the claim itself.
+    """
+    piece = board.current_piece
+    masks = PIECE_ROW_MASKS[piece.type]
+    height = board.height
+    walls = ((1 << WALL_PADDING) - 1) * ((1 << (WALL_PADDING + board.width)) + 1)
+    rows = [row << WALL_PADDING | walls for row in row_masks(board)]
+    
+    def fits(state: Tuple[int, int, int]) -> bool:
+        rotation, x, y = state
+        if x < -WALL_PADDING:
+            return False
+        for dy, mask in masks[rotation]:
+            if not 0 <= y + dy < height or rows[y + dy] & mask << (x + WALL_PADDING):
+                return False
+        return True
+    
+    kick_table = WALL_KICKS['I'] if piece.type == 'I' else WALL_KICKS['JLSTZ']
+    
+    def rotated(state: Tuple[int, int, int], direction: int) -> Optional[Tuple[int, int, int]]:
+        # Same tests in the same order as Board.rotate_piece
+        rotation, x, y = state
+        new_rotation = (rotation + direction) % 4
+        for kick_x, kick_y in [(0, 0)] + kick_table.get((rotation, new_rotation), []):
+            kicked = (new_rotation, x + kick_x, y + kick_y)
+            if fits(kicked):
+                return kicked
+        return None
+    
+    target = (rotation, x, y)
+    if not 0 <= rotation < 4 or not fits(target):
+        return None
+    while fits((rotation, x, target[2] - 1)):
+        target = (rotation, x, target[2] - 1)
+    
+    start = (piece.rotation, piece.x, piece.y)
+    if target == start:
+        return []
+    parents = {start: None}
+    queue = deque([start])
+    shift_entry = None
+    rotation_entries = []
+    while queue:
+        state = queue.popleft()
+        state_rotation, state_x, state_y = state
+        for key, dx, dy in PATH_SHIFTS:
+            next_state = (state_rotation, state_x + dx, state_y + dy)
+            if next_state not in parents:
+                if not fits(next_state):
+                    continue
+                parents[next_state] = (state, key)
+                queue.append(next_state)
+            if next_state == target and shift_entry is None:
+                shift_entry = (state, key)
+        for key, direction in PATH_ROTATIONS:
+            next_state = rotated(state, direction)
+            if next_state is None:
+                continue
+            if next_state == target:
+                rotation_entries.append((state, key))
+            if next_state not in parents:
+                parents[next_state] = (state, key)
+                queue.append(next_state)
+        
+        # Without a spin to look for, the first way in is the one
+        if shift_entry and spin == "none":
+            break
+    
+    def path_to(state: Tuple[int, int, int]) -> List[InputKey]:
+        keys = []
+        while parents[state] is not None:
+            state, key = parents[state]
+            keys.append(key)
+        return keys[::-1]
+    
+    if spin != "none":
+        for state, key in rotation_entries:
+            if spin_after(board, state, key) == spin:
+                return path_to(state) + [key]
+    if shift_entry:
+        return path_to(shift_entry[0]) + [shift_entry[1]]
+    if rotation_entries:
+        return path_to(rotation_entries[0][0]) + [rotation_entries[0][1]]
+    return None
+
+def spin_after(board: Board, state: Tuple[int, int, int], key: InputKey) -> str:
+    """Spin the board would score for rotating into place from state, without changing it"""
+    piece = board.current_piece
+    saved = (piece.rotation, piece.x, piece.y, board.last_rotation, board.last_kick)
+    piece.rotation, piece.x, piece.y = state
+    try:
+        board.rotate_piece(dict(PATH_ROTATIONS)[key])
+        return board.detect_spin().value
+    finally:
+        piece.rotation, piece.x, piece.y, board.last_rotation, board.last_kick = saved
+
+def row_masks(board: Board) -> List[int]:
+    """Grid rows as bitmasks, bit x set when column x is filled"""
+    masks = []
+    for row in board.rows:
+        mask = 0
+        for x, cell in enumerate(row):
+            if cell is not None:
+                mask |= 1 << x
+        masks.append(mask)
+    return masks
+
+class HeuristicBot:
+    """Built-in bot that hard-drops the placement scoring best under its weights.
+    
+    Has the same start/step/close interface as BotController, so tournaments can
+    mix it with external bots.
+    """
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        self.weights = dict(DEFAULT_WEIGHTS)
+        if weights:
+            self.weights.update(weights)
+        self.board = None
+    
+    def start(self, board: Board):
+        self.board = board
+        self.full_row = (1 << board.width) - 1
+    
+    def evaluate(self, rows: List[int], cells: List, x: int, y: int) -> float:
+        rows = rows[:]
+        for dx, dy in cells:
+            rows[y + dy] |= 1 << (x + dx)
+        
+        remaining = [row for row in rows if row != self.full_row]
+        lines = len(rows) - len(remaining)
+        
+        # Scan from the top: a column's height is set by its first filled cell,
+        # and every empty cell below a filled one is a hole
+        width = self.board.width
+        heights = [0] * width
+        covered = 0
+        holes = 0
+        for y in range(len(remaining) - 1, -1, -1):
+            row = remaining[y]
+            holes += bin(covered & ~row).count("1")
+            new_cells = row & ~covered
+            while new_cells:
+                low_bit = new_cells & -new_cells
+                heights[low_bit.bit_length() - 1] = y + 1
+                new_cells ^= low_bit
+            covered |= row
+        
+        bumpiness = sum(abs(heights[i] - heights[i + 1]) for i in range(width - 1))
+        weights = self.weights
+        return (weights["aggregate_height"] * sum(heights)
+                + weights["max_height"] * max(heights)
+                + weights["holes"] * holes
+                + weights["bumpiness"] * bumpiness
+                + weights["lines"] * lines
+                + (weights["tetris"] if lines == 4 else 0))
+    
+    def step(self):
+        """Pick and play a placement for the current piece"""
+        board = self.board
+        if board.game_over:
+            return
+        
+        rows = row_masks(board)
+        heights = [0] * board.width
+        for y, row in enumerate(rows):
+            for x in range(board.width):
+                if row >> x & 1:
+                    heights[x] = y + 1
+        
+        options = [(False, board.current_piece.type)]
+        if board.can_hold:
+            options.append((True, board.hold_piece or board.next_pieces[0]))
+        
+        best = None
+        for use_hold, piece_type in options:
+            for rotation, cells in enumerate(PIECE_CELLS[piece_type]):
+                if piece_type == 'O' and rotation > 0:
+                    break
+                
+                min_dx = min(dx for dx, _ in cells)
+                max_dx = max(dx for dx, _ in cells)
+                max_dy = max(dy for _, dy in cells)
+                for x in range(-min_dx, board.width - max_dx):
+                    # Straight drop onto the surface
+                    y = max(heights[x + dx] - dy for dx, dy in cells)
+                    if y + max_dy >= board.height:
+                        continue
+                    
+                    score = self.evaluate(rows, cells, x, y)
+                    if best is None or score > best[0]:
+                        best = (score, use_hold, rotation, x, y)
+        
+        if best is None:
+            board.hard_drop()
+            return
+        
+        _, use_hold, rotation, x, y = best
+        if use_hold:
+            board.hold()
+        
+        piece = board.current_piece
+        piece.rotation = rotation
+        piece.x = x
+        piece.y = y
+        board.hard_drop()
+    
+    def close(self):
+        pass
+
+class BotController:
+    """Lets an external bot choose placements for a Board"""
+    def __init__(self, command: List[str]):
+        self.bot = BotProcess(command)
+        self.shared_board = None
+        self.board = None
+        self.revealed = 0
+        # perf_counter() time of the suggest request still waiting for its reply
+        self.requested_at = None
+    
+    def start(self, board: Board):
+        if self.board is not None:
+            # A reply still on its way would be read as the answer to the new rules
+            if self.requested_at is not None:
+                self.bot.receive("suggestion", MOVE_TIMEOUT)
+                self.requested_at = None
+            self.bot.send({"type": "stop"})
+        
+        self.board = board
+        self.bot.send({"type": "rules", "randomizer": board.sequence.randomizer})
+        self.bot.receive("ready", MOVE_TIMEOUT)
+        
+        # Boards can differ in size from one game to the next
+        if self.shared_board and (self.shared_board.width, self.shared_board.height) != (board.width, board.height):
+            self.shared_board.close()
+            self.shared_board = None
+        if not self.shared_board:
+            self.shared_board = SharedBoard(board.width, board.height)
+        self.shared_board.publish(board)
+        self.revealed = board.sequence.position + NEXT_PREVIEW
+        self.bot.send({
+            "type": "start",
+            "hold": board.hold_piece,
+            "queue": [board.current_piece.type] + board.next_pieces,
+            "combo": board.combo_count,
+            "back_to_back": board.b2b_count > 0,
+            "board": None,
+            "board_shm": {
+                "name": self.shared_board.name,
+                "width": self.shared_board.width,
+                "height": self.shared_board.height
+            }
+        })
+    
+    def step(self):
+        """Ask the bot for a move and play it, however long the bot takes"""
+        if self.board.game_over:
+            return
+        
+        self.request()
+        self.play(self.bot.receive("suggestion"))
+    
+    def poll(self, wait: float) -> int:
+        """Play the moves the bot answers within wait seconds and return how many.
+        
+        An unanswered request carries over to the next call, so a slow bot
+        never blocks the caller for longer than wait; one still unanswered
+        after MOVE_TIMEOUT means the bot is stuck.
+        """
+        deadline = time.perf_counter() + wait
+        played = 0
+        while not self.board.game_over:
+            if self.requested_at is None:
+                self.request()
+            
+            suggestion = self.bot.try_receive("suggestion", max(0.0, deadline - time.perf_counter()))
+            if suggestion is None:
+                if time.perf_counter() - self.requested_at > MOVE_TIMEOUT:
+                    raise BotError(f"Bot took more than {MOVE_TIMEOUT:g} s to suggest a move")
+                break
+            self.play(suggestion)
+            played += 1
+        return played
+    
+    def request(self):
+        # Garbage may have landed since the last move; unchanged rows cost nothing
+        self.shared_board.publish(self.board)
+        self.bot.send({"type": "suggest"})
+        self.requested_at = time.perf_counter()
+    
+    def play(self, suggestion: Dict):
+        self.requested_at = None
+        if not suggestion.get("moves"):
+            raise BotError("Bot has no moves")
+        
+        move = suggestion["moves"][0]
+        apply_move(self.board, move)
+        self.shared_board.publish(self.board)
+        self.bot.send({"type": "play", "move": move})
+        
+        # Tell the bot about every piece that entered the preview
+        revealed = self.board.sequence.position + NEXT_PREVIEW
+        if revealed > self.revealed:
+            for piece_type in self.board.next_pieces[self.revealed - revealed:]:
+                self.bot.send({"type": "new_piece", "piece": piece_type})
+            self.revealed = revealed
+        
+        if self.board.game_over:
+            self.bot.send({"type": "stop"})
+    
+    def close(self):
+        self.bot.close()
+        if self.shared_board:
+            self.shared_board.close()
+            self.shared_board = None
+
+def benchmark(command: List[str], pieces: int, seed: Optional[int] = None):
+    """Let a bot play one headless game and report its speed"""
+    board = Board(seed=seed)
+    controller = BotController(command)
+    
+    try:
+        controller.start(board)
+        start = time.perf_counter()
+        while not board.game_over and board.pieces_placed < pieces:
+            controller.step()
+        elapsed = time.perf_counter() - start
+    finally:
+        controller.close()
+    
+    name = controller.bot.info.get("name", command[0])
+    pps = board.pieces_placed / elapsed if elapsed > 0 else 0
+    print(f"{name}: {board.pieces_placed} pieces, {board.lines_cleared} lines, "
+          f"{board.attack_sent} attack, {pps:.1f} PPS")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark an external Tetris bot")
+    parser.add_argument("command", help="Bot command line, e.g. \"./mybot --threads 2\"")
+    parser.add_argument("--pieces", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    
+    try:
+        benchmark(shlex.split(args.command), args.pieces, args.seed)
+    except BotError as e:
+        print(f"Bot error: {e}")
+        sys.exit(1)
@@ -0,0 +1,183 @@
+import os
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import json
+import struct
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from tetris_main import PIECE_TYPES, BOARD_WIDTH, TOTAL_HEIGHT, NEXT_PREVIEW, SPIN_CODES
+from tetris_replay import ReplayError, archive_paths, iter_replays, simulate
+
+# Piece codes used in every column: 0 for none, then IOTSZJL
+PIECE_CODES = {piece_type: i + 1 for i, piece_type in enumerate(PIECE_TYPES)}
+BOARD_DTYPE = "<u2" if BOARD_WIDTH <= 16 else "<u4" if BOARD_WIDTH <= 32 else "<u8"
+
+# One row per placement: the board and pieces before it, where the piece
+# locked, and what the lock produced
+COLUMNS = {
+    "game": ("<u4", ()),
+    "board": (BOARD_DTYPE, (TOTAL_HEIGHT,)),
+    "current": ("u1", ()),
+    "hold": ("u1", ()),
+    "queue": ("u1", (NEXT_PREVIEW,)),
+    "piece": ("u1", ()),
+    "rotation": ("u1", ()),
+    "x": ("i1", ()),
+    "y": ("i1", ()),
+    "held": ("u1", ()),
+    "spin": ("u1", ()),
+    "lines": ("u1", ()),
+    "attack": ("<u2", ())
+}
+CHUNK_ROWS = 65536
+NPY_HEADER_SIZE = 128
+
+class NpyColumn:
+    """A .npy file written in chunks, with the row count filled in on close"""
+    def __init__(self, path: str, dtype: str, shape: tuple):
+        self.file = open(path, 'wb')
+        self.dtype = np.dtype(dtype)
+        self.shape = shape
+        self.rows = 0
+        # Placeholder; the real header is the same size once the row count is known
+        self.file.write(b"\0" * NPY_HEADER_SIZE)
+    
+    def append(self, values: list):
+        array = np.asarray(values, dtype=self.dtype).reshape((-1,) + self.shape)
+        array.tofile(self.file)
+        self.rows += len(array)
+    
+    def close(self):
+        header = "{'descr': %r, 'fortran_order': False, 'shape': %r, }" % (
+            self.dtype.str, (self.rows,) + self.shape)
+        header = header.ljust(NPY_HEADER_SIZE - 11) + "\n"
+        self.file.seek(0)
+        self.file.write(b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1"))
+        self.file.close()
+
+def archive_name(path: str) -> str:
+    name = os.path.basename(path)
+    for suffix in (".gz", ".jsonl"):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    return name
+
+def export_archive(path: str, shard_dir: str) -> Dict:
+    """Stream one replay archive into a directory of .npy columns"""
+    os.makedirs(shard_dir, exist_ok=True)
+    columns = {name: NpyColumn(os.path.join(shard_dir, f"{name}.npy"), dtype, shape)
+               for name, (dtype, shape) in COLUMNS.items()}
+    buffers = {name: [] for name in COLUMNS}
+    games = []
+    rows = 0
+    
+    def flush():
+        for name, values in buffers.items():
+            if values:
+                columns[name].append(values)
+                values.clear()
+    
+    for game, replay in enumerate(iter_replays(path)):
+        info = {"player": replay.get("player"), "seed": replay["seed"], "started": replay.get("started"),
+                "first_row": rows}
+        games.append(info)
+        
+        # Columns have a fixed shape, so only the standard board size is exported
+        size = (replay.get("width", BOARD_WIDTH), replay.get("height", TOTAL_HEIGHT))
+        if size != (BOARD_WIDTH, TOTAL_HEIGHT):
+            info["error"] = f"Board is {size[0]}x{size[1]}, not {BOARD_WIDTH}x{TOTAL_HEIGHT}"
+            info["rows"] = 0
+            continue
+        
+        # Rows repeat from one placement to the next, so reuse their masks
+        previous_rows = [None] * TOTAL_HEIGHT
+        masks = [0] * TOTAL_HEIGHT
+        
+        try:
+            for step in simulate(replay):
+                before = step.before
+                for y, row in enumerate(before.grid):
+                    if row is not previous_rows[y]:
+                        masks[y] = sum(1 << x for x, cell in enumerate(row) if cell is not None)
+                        previous_rows[y] = row
+                
+                piece_type, rotation, x, y, held = step.placement
+                queue = before.sequence.peek(NEXT_PREVIEW)
+                
+                buffers["game"].append(game)
+                buffers["board"].append(list(masks))
+                buffers["current"].append(PIECE_CODES[before.current_piece[0]])
+                buffers["hold"].append(PIECE_CODES.get(before.hold_piece, 0))
+                buffers["queue"].append([PIECE_CODES[p] for p in queue])
+                buffers["piece"].append(PIECE_CODES[piece_type])
+                buffers["rotation"].append(rotation)
+                buffers["x"].append(x)
+                buffers["y"].append(y)
+                buffers["held"].append(held)
+                buffers["spin"].append(SPIN_CODES[step.spin])
+                buffers["lines"].append(step.lines)
+                buffers["attack"].append(step.attack)
+                rows += 1
+                
+                if len(buffers["game"]) >= CHUNK_ROWS:
+                    flush()
+        except ReplayError as e:
+            # Keep the rows up to the desync and note where it happened
+            info["error"] = str(e)
+        
+        info["rows"] = rows - info["first_row"]
+    
+    flush()
+    for column in columns.values():
+        column.close()
+    
+    manifest = {"source": path, "rows": rows, "games": games}
+    with open(os.path.join(shard_dir, "manifest.json"), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return {"shard": os.path.basename(shard_dir), "source": path, "rows": rows, "games": len(games)}
+
+def export(paths: List[str], out_dir: str, workers: Optional[int] = None) -> Dict:
+    """Export every archive in parallel, one shard directory per archive"""
+    archives = archive_paths(paths)
+    os.makedirs(out_dir, exist_ok=True)
+    shard_dirs = [os.path.join(out_dir, f"{i:05d}-{archive_name(path)}") for i, path in enumerate(archives)]
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        shards = list(pool.map(export_archive, archives, shard_dirs))
+    
+    dataset = {
+        "board_width": BOARD_WIDTH,
+        "board_height": TOTAL_HEIGHT,
+        "piece_codes": PIECE_CODES,
+        "spin_codes": {spin.value: code for spin, code in SPIN_CODES.items()},
+        "rows": sum(shard["rows"] for shard in shards),
+        "shards": shards
+    }
+    with open(os.path.join(out_dir, "dataset.json"), 'w') as f:
+        json.dump(dataset, f, indent=2)
+    return dataset
+
+def load_dataset(out_dir: str) -> List[Dict[str, np.ndarray]]:
+    """Memory-map every column of every shard of an exported dataset"""
+    with open(os.path.join(out_dir, "dataset.json"), 'r') as f:
+        dataset = json.load(f)
+    
+    return [
+        {name: np.load(os.path.join(out_dir, shard["shard"], f"{name}.npy"), mmap_mode='r')
+         for name in COLUMNS}
+        for shard in dataset["shards"]
+    ]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export replay archives as columnar training data")
+    parser.add_argument("archives", nargs="+", help="Replay archives or directories of them")
+    parser.add_argument("--out", required=True, help="Output dataset directory")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: all cores)")
+    args = parser.parse_args()
+    
+    dataset = export(args.archives, args.out, args.workers)
+    print(f"Exported {dataset['rows']} placements from {len(dataset['shards'])} archives to {args.out}")
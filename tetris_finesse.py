@@ -0,0 +1,163 @@
+import json
+import os
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from tetris_main import Board, Piece, InputKey, SpinType, PIECE_TYPES, BOARD_WIDTH, TOTAL_HEIGHT
+
+FINESSE_VERSION = 1
+DEFAULT_TABLE_PATH = "finesse_table.json"
+
+# Inputs a finesse path is built from. Like InputHandler, a press moves once
+# straight away and holding it past DAS auto-repeats, so a held direction
+# reaches the wall for the price of one press.
+MOVES = ["left", "right", "das_left", "das_right", "cw", "ccw", "180"]
+COUNTED_KEYS = {InputKey.LEFT, InputKey.RIGHT, InputKey.ROTATE_CW, InputKey.ROTATE_CCW, InputKey.ROTATE_180}
+
+def footprint(piece_type: str, rotation: int, x: int, y: int) -> str:
+    """Cells a placement covers, shifted down to row 0 so the stack height doesn't matter"""
+    piece = Piece(piece_type, x, y)
+    piece.rotation = rotation
+    blocks = piece.get_blocks()
+    bottom = min(block_y for _, block_y in blocks)
+    return ";".join(f"{block_x},{block_y - bottom}" for block_x, block_y in sorted(blocks))
+
+def apply_finesse_move(board: Board, move: str):
+    if move == "left":
+        board.move_piece(-1, 0)
+    elif move == "right":
+        board.move_piece(1, 0)
+    elif move == "das_left":
+        while board.move_piece(-1, 0):
+            pass
+    elif move == "das_right":
+        while board.move_piece(1, 0):
+            pass
+    elif move == "cw":
+        board.rotate_piece(1)
+    elif move == "ccw":
+        board.rotate_piece(-1)
+    elif move == "180":
+        board.rotate_180()
+
+def rotations(piece_type: str, x: int, y: int) -> List[Piece]:
+    pieces = []
+    for rotation in range(4):
+        piece = Piece(piece_type, x, y)
+        piece.rotation = rotation
+        pieces.append(piece)
+    return pieces
+
+def build_table(width: int = BOARD_WIDTH, height: int = TOTAL_HEIGHT) -> Dict[str, Dict[str, List[str]]]:
+    """Shortest input sequence from spawn to every placement on an empty board"""
+    board = Board(seed=0, width=width, height=height)
+    table = {}
+    
+    for piece_type in PIECE_TYPES:
+        # Some rotations don't fit at spawn height (the vertical I needs two rows
+        # of gravity first), so start where every rotation fits
+        start_y = board.spawn_y
+        while not all(board.is_valid_position(piece) for piece in rotations(piece_type, board.spawn_x, start_y)):
+            start_y -= 1
+        
+        paths = {}
+        start = (0, board.spawn_x, start_y)
+        seen = {start: []}
+        queue = deque([start])
+        
+        # Breadth-first, so the first path reaching a footprint is a shortest one
+        while queue:
+            state = queue.popleft()
+            rotation, x, y = state
+            paths.setdefault(footprint(piece_type, rotation, x, y), seen[state])
+            
+            for move in MOVES:
+                board.current_piece = Piece(piece_type, x, y)
+                board.current_piece.rotation = rotation
+                apply_finesse_move(board, move)
+                
+                piece = board.current_piece
+                next_state = (piece.rotation, piece.x, piece.y)
+                if next_state not in seen:
+                    seen[next_state] = seen[state] + [move]
+                    queue.append(next_state)
+        
+        table[piece_type] = paths
+    
+    return table
+
+def load_table(path: str = DEFAULT_TABLE_PATH, width: int = BOARD_WIDTH,
+               height: int = TOTAL_HEIGHT) -> Dict[str, Dict[str, List[str]]]:
+    """Cached finesse table, rebuilt when missing or made for another board"""
+    board = Board(seed=0, width=width, height=height)
+    key = {"version": FINESSE_VERSION, "board_width": width, "board_height": height,
+           "spawn": [board.spawn_x, board.spawn_y]}
+    
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if data.get("key") == key:
+            return data["table"]
+    
+    table = build_table(width, height)
+    with open(path, 'w') as f:
+        json.dump({"key": key, "table": table}, f)
+    return table
+
+class FinesseTracker:
+    """Compares each placement's key presses with the optimal path"""
+    def __init__(self, table: Dict[str, Dict[str, List[str]]]):
+        self.table = table
+        self.inputs = 0
+        self.soft_dropped = False
+        
+        # Session totals
+        self.pieces = 0
+        self.clean_pieces = 0
+        self.faults = 0
+        self.last_fault = None
+    
+    def reset_piece(self):
+        self.inputs = 0
+        self.soft_dropped = False
+    
+    def on_press(self, key: InputKey):
+        if key in COUNTED_KEYS:
+            self.inputs += 1
+        elif key == InputKey.SOFT_DROP:
+            self.soft_dropped = True
+        elif key == InputKey.HOLD:
+            self.reset_piece()
+    
+    def on_lock(self, board: Board) -> Optional[int]:
+        """Faults for the piece that just locked, or None if it can't be judged"""
+        piece_type, rotation, x, y, _ = board.last_placement
+        inputs = self.inputs
+        soft_dropped = self.soft_dropped
+        self.reset_piece()
+        
+        # Tucks and spins need soft drop, which an empty-board path can't express
+        optimal = self.table[piece_type].get(footprint(piece_type, rotation, x, y))
+        if optimal is None or soft_dropped or board.last_spin != SpinType.NONE:
+            return None
+        
+        faults = max(0, inputs - len(optimal))
+        self.pieces += 1
+        if faults:
+            self.faults += faults
+            self.last_fault = (piece_type, optimal)
+        else:
+            self.clean_pieces += 1
+        return faults
+    
+    def snapshot(self) -> Tuple:
+        return (self.pieces, self.clean_pieces, self.faults, self.last_fault)
+    
+    def restore(self, snapshot: Tuple):
+        """Back to the session totals of a snapshot(), with no inputs counted for the piece"""
+        self.pieces, self.clean_pieces, self.faults, self.last_fault = snapshot
+        self.reset_piece()
+    
+    @property
+    def rate(self) -> float:
+        return self.clean_pieces / self.pieces * 100 if self.pieces else 100.0
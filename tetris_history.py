@@ -0,0 +1,169 @@
+import json
+import queue
+import sqlite3
+import threading
+import time
+import argparse
+from typing import Dict, List, Tuple
+
+DEFAULT_HISTORY_PATH = "history.db"
+BATCH_SIZE = 64
+FLUSH_INTERVAL = 1.0  # seconds a queued game may wait for more to batch with
+TIMED_MODES = ("sprint", "cheese")  # ranked by fastest time rather than score
+BEST_ORDERS = {"score": "DESC", "time": "ASC"}  # columns personal bests can rank by, best first
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    finished_at REAL NOT NULL,
+    mode TEXT NOT NULL,
+    game_over INTEGER NOT NULL,
+    time REAL NOT NULL,
+    pieces INTEGER NOT NULL,
+    lines INTEGER NOT NULL,
+    attack INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    pps REAL NOT NULL,
+    apm REAL NOT NULL,
+    settings TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS splits (
+    game_id INTEGER NOT NULL REFERENCES games(id),
+    piece INTEGER NOT NULL,
+    time_ms INTEGER NOT NULL,
+    lines INTEGER NOT NULL,
+    attack INTEGER NOT NULL,
+    PRIMARY KEY (game_id, piece)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS games_mode_score ON games (mode, score DESC);
+CREATE INDEX IF NOT EXISTS games_mode_time ON games (mode, time);
+CREATE INDEX IF NOT EXISTS games_mode_finished_at ON games (mode, finished_at);
+DROP INDEX IF EXISTS games_finished_at;
+"""
+
+_STOP = object()
+
+def connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    # WAL lets queries read while the writer thread commits
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+class HistoryStore:
+    """Saves finished games to SQLite in batches from a background thread"""
+    def __init__(self, path: str = DEFAULT_HISTORY_PATH):
+        self.path = path
+        self.queue = queue.Queue()
+        
+        # Create the schema up front so queries work before the first write
+        connect(path).close()
+        
+        self.thread = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self.thread.start()
+    
+    def record_game(self, mode: str, stats: Dict, game_over: bool, settings: Dict,
+                    splits: List[Tuple[int, int, int]]):
+        """Queue a game; splits are (time_ms, lines, attack) per piece. Never blocks."""
+        self.queue.put((time.time(), mode, dict(stats), game_over, json.dumps(settings), splits))
+    
+    def _write_loop(self):
+        conn = connect(self.path)
+        running = True
+        
+        while running:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            
+            # Gather whatever else arrives soon so it shares one commit
+            while len(batch) < BATCH_SIZE and batch[-1] is not _STOP:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            
+            if batch[-1] is _STOP:
+                batch.pop()
+                running = False
+            
+            if batch:
+                try:
+                    self._write_batch(conn, batch)
+                except sqlite3.Error as e:
+                    # A locked or full database shouldn't stop later games being saved
+                    print(f"Could not save {len(batch)} games to history: {e}")
+        
+        conn.close()
+    
+    def _write_batch(self, conn: sqlite3.Connection, batch: List):
+        with conn:
+            for finished_at, mode, stats, game_over, settings, splits in batch:
+                cursor = conn.execute(
+                    "INSERT INTO games (finished_at, mode, game_over, time, pieces, lines, attack,"
+                    " score, level, pps, apm, settings) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (finished_at, mode, int(game_over), stats["time"], stats["pieces"], stats["lines"],
+                     stats["attack"], stats["score"], stats["level"], stats["pps"], stats["apm"], settings)
+                )
+                conn.executemany(
+                    "INSERT INTO splits (game_id, piece, time_ms, lines, attack) VALUES (?, ?, ?, ?, ?)",
+                    [(cursor.lastrowid, i + 1, time_ms, lines, attack)
+                     for i, (time_ms, lines, attack) in enumerate(splits)]
+                )
+    
+    def close(self):
+        """Write out everything still queued"""
+        self.queue.put(_STOP)
+        self.thread.join()
+
+def personal_bests(path: str, mode: str, order: str = "score", limit: int = 10) -> List[sqlite3.Row]:
+    """Top games of a mode by highest score or, with order="time", fastest time"""
+    if order not in BEST_ORDERS:
+        raise ValueError(f"Can't rank games by {order!r}; use one of {', '.join(BEST_ORDERS)}")
+    direction = BEST_ORDERS[order]
+    conn = connect(path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return conn.execute(
+            f"SELECT * FROM games WHERE mode = ? ORDER BY {order} {direction} LIMIT ?",
+            (mode, limit)
+        ).fetchall()
+    finally:
+        conn.close()
+
+def trend(path: str, mode: str, days: int = 30) -> List[sqlite3.Row]:
+    """Daily game count, average pace and best score for the last days"""
+    conn = connect(path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return conn.execute(
+            "SELECT date(finished_at, 'unixepoch', 'localtime') AS day, COUNT(*) AS games,"
+            " AVG(pps) AS pps, AVG(apm) AS apm, MAX(score) AS best_score"
+            " FROM games WHERE mode = ? AND finished_at >= ? GROUP BY day ORDER BY day",
+            (mode, time.time() - days * 86400)
+        ).fetchall()
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Personal bests and trends from the game history")
+    parser.add_argument("--db", default=DEFAULT_HISTORY_PATH)
+    parser.add_argument("--mode", default="marathon")
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+    
+    order = "time" if args.mode in TIMED_MODES else "score"
+    print(f"Personal bests ({args.mode})")
+    for row in personal_bests(args.db, args.mode, order):
+        finished = time.strftime("%Y-%m-%d %H:%M", time.localtime(row["finished_at"]))
+        result = f"{row['time']:>9.3f}s" if order == "time" else f"{row['score']:>10,}"
+        print(f"  {result}  {row['lines']:>4} lines  {row['pps']:.2f} PPS  {finished}")
+    
+    print(f"\nLast {args.days} days")
+    for row in trend(args.db, args.mode, args.days):
+        print(f"  {row['day']}  {row['games']:>4} games  {row['pps']:.2f} PPS  "
+              f"{row['apm']:.1f} APM  best {row['best_score']:,}")
@@ -0,0 +1,103 @@
+import time
+STARTED_NS = time.perf_counter_ns()  # before the heavy imports, so they count toward cold start
+
+import os
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import pygame
+
+from tetris_main import (Game, Settings, add_game_arguments, configure_events, game_options, get_font,
+                         SCREEN_WIDTH, SCREEN_HEIGHT)
+from tetris_settings import SettingsMenu
+
+def ms(ns: int) -> str:
+    return f"{ns / 1e6:.1f} ms"
+
+class Launcher:
+    """One window, font cache and Settings shared by a stack of scenes.
+    
+    Only the top scene polls events and draws. The settings key pushes the
+    settings menu over the paused game; closing it pops back to the game
+    with the edited Settings already in effect.
+    """
+    def __init__(self, game_options: Optional[Dict] = None):
+        self.timings = [("imports", time.perf_counter_ns() - STARTED_NS)]
+        
+        with self.timed("pygame"):
+            pygame.init()
+        with self.timed("window"):
+            self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+            pygame.display.set_caption("Tetris SRS+")
+            configure_events()
+        with self.timed("settings"):
+            self.settings = Settings()
+            self.settings.load()
+        with self.timed("game"):
+            self.game = Game(screen=self.screen, settings=self.settings, **(game_options or {}))
+            self.game.on_settings = self.open_settings
+        with self.timed("first frame"):
+            self.game.draw()
+        self.timings.append(("total", time.perf_counter_ns() - STARTED_NS))
+        
+        self.scenes = [self.game]
+        # (opened, closed) times of each visit to the settings menu
+        self.switches: List[List[int]] = []
+    
+    @contextmanager
+    def timed(self, name: str):
+        start = time.perf_counter_ns()
+        yield
+        self.timings.append((name, time.perf_counter_ns() - start))
+    
+    def open_settings(self):
+        start = time.perf_counter_ns()
+        menu = SettingsMenu(self.screen, self.settings, background=self.screen.copy())
+        menu.draw()
+        self.scenes.append(menu)
+        self.switches.append([time.perf_counter_ns() - start, 0])
+    
+    def close_scene(self):
+        start = time.perf_counter_ns()
+        scene = self.scenes.pop()
+        scene.close()
+        if self.scenes:
+            self.scenes[-1].resume()
+            self.switches[-1][1] = time.perf_counter_ns() - start
+    
+    def run(self):
+        while self.scenes:
+            scene = self.scenes[-1]
+            events = scene.poll_events()
+            
+            # Closing the window ends every scene, not just the top one
+            if any(event.type == pygame.QUIT for event in events):
+                while self.scenes:
+                    self.scenes.pop().close()
+                break
+            
+            scene.frame(events)
+            if not scene.running:
+                self.close_scene()
+        
+        get_font.cache_clear()
+        pygame.quit()
+    
+    def report(self):
+        print("Cold start: " + ", ".join(f"{name} {ms(ns)}" for name, ns in self.timings))
+        for opened, closed in self.switches:
+            print(f"Settings menu: opened in {ms(opened)}, closed in {ms(closed)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tetris SRS+ with the settings menu in the same window")
+    add_game_arguments(parser)
+    parser.add_argument("--timing", action="store_true", help="Print cold-start and menu switch times on exit")
+    args = parser.parse_args()
+    
+    launcher = Launcher(game_options(parser, args))
+    launcher.run()
+    if args.timing:
+        launcher.report()
\ No newline at end of file
@@ -1,12 +1,19 @@
 import pygame
 import json
 import os
+import copy
+import shlex
+import argparse
+from collections import deque
 from enum import Enum
-from dataclasses import dataclass
-from typing import Dict, List, Tuple, Optional
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Tuple, Optional
 import time
 import random
 
+from tetris_stats import StatsRecorder
+
 # Constants
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
@@ -18,6 +25,17 @@ TOTAL_HEIGHT = VISIBLE_HEIGHT + BUFFER_HEIGHT
 CELL_SIZE = 25
 BOARD_X = 250
 BOARD_Y = 50
+BOARD_AREA_WIDTH = BOARD_WIDTH * CELL_SIZE  # Screen space for the board; cells shrink to fit larger boards
+BOARD_AREA_HEIGHT = VISIBLE_HEIGHT * CELL_SIZE
+UNDO_LIMIT = 1000  # Snapshots kept for practice-mode undo
+NEXT_PREVIEW = 5
+SIM_TICK_NS = 1_000_000  # Fixed simulation step; timing is counted in these
+MAX_FRAME_NS = 250_000_000  # Longer stalls (e.g. a dragged window) are not caught up
+DEFAULT_FPS = 60  # When the display's refresh rate is unknown
+MIN_FPS = 30
+MAX_FPS = 360
+FRAME_BUDGET = 0.5  # Share of a frame that update and draw may take before the cap drops
+SOFT_DROP_RATE = 60  # Cells per second for each point of SDF (SDF cells per frame at 60 FPS)
 
 # Colors
 BLACK = (0, 0, 0)
@@ -33,6 +51,7 @@ MAGENTA = (255, 0, 255)
 YELLOW = (255, 255, 0)
 ORANGE = (255, 165, 0)
 PURPLE = (128, 0, 128)
+GARBAGE_COLOR = GRAY
 
 # Piece colors
 PIECE_COLORS = {
@@ -115,6 +134,126 @@ WALL_KICKS = {
     }
 }
 
+PIECE_TYPES = list(PIECES.keys())
+
+class SpinType(Enum):
+    NONE = "none"
+    MINI = "mini"
+    FULL = "full"
+
+# Compact spin codes for stats and exported data
+SPIN_CODES = {SpinType.NONE: 0, SpinType.MINI: 1, SpinType.FULL: 2}
+
+# Attack by line count for each kind of clear
+ATTACK_TABLE = {
+    SpinType.NONE: [0, 0, 1, 2, 4],
+    SpinType.MINI: [0, 0, 1, 2, 4],
+    SpinType.FULL: [0, 2, 4, 6, 10]
+}
+COMBO_TABLE = [0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 4, 5]
+
+# Index of the last SRS kick test, which always makes a T-spin a full one
+FINAL_KICK = 4
+
+def _t_corners():
+    """(front, back) corner offsets of the T box for each rotation"""
+    corners = [(0, 0), (2, 0), (0, 2), (2, 2)]
+    table = []
+    for shape in PIECES['T']:
+        # The nub is the arm with nothing opposite it across the centre
+        nub = next((x, y) for x, y in [(1, 0), (0, 1), (2, 1), (1, 2)]
+                   if shape[y][x] and not shape[2 - y][2 - x])
+        front = tuple(c for c in corners if abs(c[0] - nub[0]) + abs(c[1] - nub[1]) == 1)
+        back = tuple(c for c in corners if c not in front)
+        table.append((front, back))
+    return table
+
+def _neighbor_cells():
+    """Cells just outside each piece rotation, one group per direction"""
+    table = {}
+    for piece_type, shapes in PIECES.items():
+        table[piece_type] = []
+        for shape in shapes:
+            cells = {(x, y) for y, row in enumerate(shape) for x, cell in enumerate(row) if cell}
+            table[piece_type].append(tuple(
+                tuple((x + dx, y + dy) for x, y in cells if (x + dx, y + dy) not in cells)
+                for dx, dy in [(-1, 0), (1, 0), (0, 1), (0, -1)]
+            ))
+    return table
+
+T_CORNERS = _t_corners()
+NEIGHBOR_CELLS = _neighbor_cells()
+
+class SevenBag:
+    """Each group of 7 pieces holds one of every type"""
+    def extend(self, rng: random.Random, pieces: bytearray):
+        bag = list(range(len(PIECE_TYPES)))
+        rng.shuffle(bag)
+        pieces.extend(bag)
+
+class FourteenBag:
+    """Each group of 14 pieces holds two of every type"""
+    def extend(self, rng: random.Random, pieces: bytearray):
+        bag = list(range(len(PIECE_TYPES))) * 2
+        rng.shuffle(bag)
+        pieces.extend(bag)
+
+class ClassicRandomizer:
+    """Memoryless picks with a single reroll on repeats (NES style)"""
+    def extend(self, rng: random.Random, pieces: bytearray):
+        last = pieces[-1] if pieces else None
+        piece = rng.randrange(len(PIECE_TYPES) + 1)
+        if piece == len(PIECE_TYPES) or piece == last:
+            piece = rng.randrange(len(PIECE_TYPES))
+        pieces.append(piece)
+
+RANDOMIZERS = {
+    "7bag": SevenBag,
+    "14bag": FourteenBag,
+    "classic": ClassicRandomizer
+}
+
+class PieceSequence:
+    """Seeded piece stream generated on demand.
+    
+    Pieces are stored as indices into PIECE_TYPES in an append-only buffer and
+    read through a cursor, so popping is a cursor bump and peeking any depth
+    only generates what is missing. Copies made with fork() share the buffer,
+    which keeps snapshots and versus opponents on the same sequence for free.
+    """
+    def __init__(self, seed: Optional[int] = None, randomizer: str = "7bag"):
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.randomizer = randomizer
+        self._generator = RANDOMIZERS[randomizer]()
+        self._rng = random.Random(self.seed)
+        self._pieces = bytearray()
+        self.position = 0
+    
+    def _generate(self, count: int):
+        while len(self._pieces) < count:
+            self._generator.extend(self._rng, self._pieces)
+    
+    def fork(self) -> "PieceSequence":
+        """Independent cursor over the same pieces"""
+        return copy.copy(self)
+    
+    def pop(self) -> str:
+        self._generate(self.position + 1)
+        piece = PIECE_TYPES[self._pieces[self.position]]
+        self.position += 1
+        return piece
+    
+    def peek(self, depth: int = 1) -> List[str]:
+        end = self.position + depth
+        self._generate(end)
+        return [PIECE_TYPES[i] for i in self._pieces[self.position:end]]
+    
+    def bulk(self, count: int) -> bytearray:
+        """Upcoming pieces as PIECE_TYPES indices, without consuming them"""
+        end = self.position + count
+        self._generate(end)
+        return self._pieces[self.position:end]
+
 class InputKey(Enum):
     LEFT = "left"
     RIGHT = "right"
@@ -126,6 +265,9 @@ class InputKey(Enum):
     HOLD = "hold"
     PAUSE = "pause"
     RESTART = "restart"
+    UNDO = "undo"
+    REDO = "redo"
+    SETTINGS = "settings"
 
 @dataclass
 class Settings:
@@ -135,34 +277,54 @@ class Settings:
     gravity: float = 1.0
     lock_delay: int = 500  # ms
     
-    keybinds: Dict[InputKey, int] = None
+    keybinds: Dict[InputKey, List[int]] = None  # Any of an action's keys triggers it
+    # Bumped whenever keybinds change, so InputHandler knows to rebuild its index
+    keybind_version: int = field(default=0, compare=False, repr=False)
     
     def __post_init__(self):
         if self.keybinds is None:
             self.keybinds = {
-                InputKey.LEFT: pygame.K_LEFT,
-                InputKey.RIGHT: pygame.K_RIGHT,
-                InputKey.SOFT_DROP: pygame.K_DOWN,
-                InputKey.HARD_DROP: pygame.K_SPACE,
-                InputKey.ROTATE_CW: pygame.K_UP,
-                InputKey.ROTATE_CCW: pygame.K_z,
-                InputKey.ROTATE_180: pygame.K_a,
-                InputKey.HOLD: pygame.K_c,
-                InputKey.PAUSE: pygame.K_ESCAPE,
-                InputKey.RESTART: pygame.K_r
+                InputKey.LEFT: [pygame.K_LEFT],
+                InputKey.RIGHT: [pygame.K_RIGHT],
+                InputKey.SOFT_DROP: [pygame.K_DOWN],
+                InputKey.HARD_DROP: [pygame.K_SPACE],
+                InputKey.ROTATE_CW: [pygame.K_UP],
+                InputKey.ROTATE_CCW: [pygame.K_z],
+                InputKey.ROTATE_180: [pygame.K_a],
+                InputKey.HOLD: [pygame.K_c],
+                InputKey.PAUSE: [pygame.K_ESCAPE],
+                InputKey.RESTART: [pygame.K_r],
+                InputKey.UNDO: [pygame.K_u],
+                InputKey.REDO: [pygame.K_y],
+                InputKey.SETTINGS: [pygame.K_F1]
             }
     
-    def save(self, filename="settings.json"):
-        data = {
+    def reset(self):
+        """Restore the defaults in place, so everything sharing this object sees them"""
+        defaults = Settings()
+        for setting in fields(self):
+            if setting.name != "keybind_version":
+                setattr(self, setting.name, getattr(defaults, setting.name))
+        self.keybind_version += 1
+    
+    def bind(self, action: InputKey, keys: List[int]):
+        """Set an action's keys; change keybinds only through here or load()"""
+        self.keybinds[action] = list(keys)
+        self.keybind_version += 1
+    
+    def to_dict(self) -> Dict:
+        return {
             "das": self.das,
             "arr": self.arr,
             "sdf": self.sdf,
             "gravity": self.gravity,
             "lock_delay": self.lock_delay,
-            "keybinds": {k.value: v for k, v in self.keybinds.items()}
+            "keybinds": {k.value: list(v) for k, v in self.keybinds.items()}
         }
+    
+    def save(self, filename="settings.json"):
         with open(filename, 'w') as f:
-            json.dump(data, f, indent=2)
+            json.dump(self.to_dict(), f, indent=2)
     
     def load(self, filename="settings.json"):
         if os.path.exists(filename):
@@ -175,9 +337,12 @@ class Settings:
                 self.lock_delay = data.get("lock_delay", self.lock_delay)
                 
                 if "keybinds" in data:
-                    self.keybinds = {
-                        InputKey(k): v for k, v in data["keybinds"].items()
-                    }
+                    # Merge so files saved before new actions existed keep their
+                    # defaults; older files hold a single key code per action
+                    self.keybinds.update({
+                        InputKey(k): v if isinstance(v, list) else [v] for k, v in data["keybinds"].items()
+                    })
+                    self.keybind_version += 1
 
 class Piece:
     def __init__(self, piece_type: str, x: int = 3, y: int = 18):
@@ -200,14 +365,55 @@ class Piece:
                     blocks.append((self.x + x, self.y + y))
         return blocks
 
+class BoardSnapshot(NamedTuple):
+    """Immutable copy of a Board's state; rows are shared between snapshots"""
+    grid: Tuple[tuple, ...]
+    current_piece: Optional[Tuple[str, int, int, int]]  # (type, x, y, rotation)
+    hold_piece: Optional[str]
+    can_hold: bool
+    sequence: PieceSequence
+    game_over: bool
+    lines_cleared: int
+    level: int
+    score: int
+    pieces_placed: int
+    attack_sent: int
+    b2b_count: int
+    combo_count: int
+    gravity_timer: float
+    lock_timer: float
+    is_locking: bool
+    lock_moves: int
+    last_rotation: bool
+    last_kick: int
+
 class Board:
-    def __init__(self):
-        self.grid = [[None for _ in range(BOARD_WIDTH)] for _ in range(TOTAL_HEIGHT)]
+    def __init__(self, seed: Optional[int] = None, randomizer: str = "7bag",
+                 width: int = BOARD_WIDTH, height: int = TOTAL_HEIGHT):
+        self.width = width
+        self.height = height
+        # The bottom rows are shown; the rest is buffer above them
+        self.visible_height = max(height - BUFFER_HEIGHT, height // 2)
+        # Centered, with the piece's lowest row two below the top visible row
+        self.spawn_x = (width - 4) // 2
+        self.spawn_y = self.visible_height - 2
+        
+        self.empty_row = (None,) * width
+        self.grid = [[None] * width for _ in range(height)]
+        # Frozen copy of each grid row, kept in step with the grid so snapshots
+        # only copy row references instead of every cell
+        self._rows = [self.empty_row] * height
+        # Filled cells per row and in total, so clears and perfect clears don't
+        # rescan the board
+        self.row_fill = [0] * height
+        self.filled_cells = 0
+        # Garbage rows pushed up so far; lets the renderer scroll instead of redrawing
+        self.rows_pushed = 0
+        self._garbage_rows = {}  # hole column -> frozen garbage row, shared between rows
         self.current_piece = None
         self.hold_piece = None
         self.can_hold = True
-        self.next_pieces = []
-        self.bag = []
+        self.sequence = PieceSequence(seed, randomizer)
         self.game_over = False
         
         # Stats
@@ -226,33 +432,101 @@ class Board:
         self.lock_moves = 0
         self.max_lock_moves = 15
         
-        # Initialize piece queue
-        self._refill_bag()
-        self.next_pieces = [self._get_next_from_bag() for _ in range(5)]
+        # Spin tracking: whether the last successful move was a rotation, and
+        # which kick test it used (0 = no kick)
+        self.last_rotation = False
+        self.last_kick = 0
+        self.last_spin = SpinType.NONE
+        
+        # (type, rotation, x, y, held) of the most recently locked piece and
+        # what its lock produced
+        self.last_placement = None
+        self.last_lines = 0
+        self.last_attack = 0
+        self.last_garbage_cleared = 0
+        
+        # Called after every lock, once the next piece has spawned
+        self.on_lock = None
+        
         self.spawn_piece()
     
-    def _refill_bag(self):
-        self.bag = list(PIECES.keys())
-        random.shuffle(self.bag)
+    @property
+    def next_pieces(self) -> List[str]:
+        return self.sequence.peek(NEXT_PREVIEW)
     
-    def _get_next_from_bag(self):
-        if not self.bag:
-            self._refill_bag()
-        return self.bag.pop()
+    @property
+    def rows(self) -> List[tuple]:
+        """Frozen rows, bottom first; a row is replaced, never mutated, when it changes"""
+        return self._rows
+    
+    def snapshot(self) -> BoardSnapshot:
+        """Capture the full game state as an immutable value"""
+        piece = self.current_piece
+        return BoardSnapshot(
+            grid=tuple(self._rows),
+            current_piece=(piece.type, piece.x, piece.y, piece.rotation) if piece else None,
+            hold_piece=self.hold_piece,
+            can_hold=self.can_hold,
+            sequence=self.sequence.fork(),
+            game_over=self.game_over,
+            lines_cleared=self.lines_cleared,
+            level=self.level,
+            score=self.score,
+            pieces_placed=self.pieces_placed,
+            attack_sent=self.attack_sent,
+            b2b_count=self.b2b_count,
+            combo_count=self.combo_count,
+            gravity_timer=self.gravity_timer,
+            lock_timer=self.lock_timer,
+            is_locking=self.is_locking,
+            lock_moves=self.lock_moves,
+            last_rotation=self.last_rotation,
+            last_kick=self.last_kick
+        )
+    
+    def restore(self, snapshot: BoardSnapshot):
+        """Return the board to a state captured by snapshot()"""
+        self._rows = list(snapshot.grid)
+        self.grid = [list(row) for row in snapshot.grid]
+        self.row_fill = [self.width - row.count(None) for row in self._rows]
+        self.filled_cells = sum(self.row_fill)
+        
+        if snapshot.current_piece:
+            piece_type, x, y, rotation = snapshot.current_piece
+            self.current_piece = Piece(piece_type, x, y)
+            self.current_piece.rotation = rotation
+        else:
+            self.current_piece = None
+        
+        self.hold_piece = snapshot.hold_piece
+        self.can_hold = snapshot.can_hold
+        self.sequence = snapshot.sequence.fork()
+        self.game_over = snapshot.game_over
+        
+        self.lines_cleared = snapshot.lines_cleared
+        self.level = snapshot.level
+        self.score = snapshot.score
+        self.pieces_placed = snapshot.pieces_placed
+        self.attack_sent = snapshot.attack_sent
+        self.b2b_count = snapshot.b2b_count
+        self.combo_count = snapshot.combo_count
+        
+        self.gravity_timer = snapshot.gravity_timer
+        self.lock_timer = snapshot.lock_timer
+        self.is_locking = snapshot.is_locking
+        self.lock_moves = snapshot.lock_moves
+        self.last_rotation = snapshot.last_rotation
+        self.last_kick = snapshot.last_kick
     
     def spawn_piece(self):
-        piece_type = self.next_pieces.pop(0)
-        self.next_pieces.append(self._get_next_from_bag())
-        
-        # SRS+ spawn position - spawn near top of grid (which appears at bottom after display flip)
-        spawn_x = 3
-        spawn_y = 38  # Near top of total grid
+        piece_type = self.sequence.pop()
         
-        self.current_piece = Piece(piece_type, spawn_x, spawn_y)
+        self.current_piece = Piece(piece_type, self.spawn_x, self.spawn_y)
         self.can_hold = True
         self.is_locking = False
         self.lock_timer = 0
         self.lock_moves = 0
+        self.last_rotation = False
         
         # Check game over
         if not self.is_valid_position(self.current_piece):
@@ -264,9 +538,9 @@ class Board:
             new_y = block_y + dy
             
             # Check boundaries
-            if new_x < 0 or new_x >= BOARD_WIDTH:
+            if new_x < 0 or new_x >= self.width:
                 return False
-            if new_y < 0 or new_y >= TOTAL_HEIGHT:
+            if new_y < 0 or new_y >= self.height:
                 return False
             # Check collision with placed pieces
             if self.grid[new_y][new_x] is not None:
@@ -278,6 +552,7 @@ class Board:
         if self.is_valid_position(self.current_piece, dx, dy):
             self.current_piece.x += dx
             self.current_piece.y += dy
+            self.last_rotation = False
             
             # Reset lock timer on successful move
             if self.is_locking and dy == 0:
@@ -303,13 +578,15 @@ class Board:
                 self.lock_moves += 1
                 if self.lock_moves < self.max_lock_moves:
                     self.lock_timer = 0
+            self.last_rotation = True
+            self.last_kick = 0
             return True
         
         # Try wall kicks
         kick_table = WALL_KICKS['I'] if self.current_piece.type == 'I' else WALL_KICKS['JLSTZ']
         kicks = kick_table.get((old_rotation, new_rotation), [])
         
-        for kick_x, kick_y in kicks:
+        for kick_index, (kick_x, kick_y) in enumerate(kicks):
             if self.is_valid_position(self.current_piece, kick_x, kick_y):
                 self.current_piece.x += kick_x
                 self.current_piece.y += kick_y
@@ -317,6 +594,8 @@ class Board:
                     self.lock_moves += 1
                     if self.lock_moves < self.max_lock_moves:
                         self.lock_timer = 0
+                self.last_rotation = True
+                self.last_kick = kick_index
                 return True
         
         # Rotation failed
@@ -348,7 +627,6 @@ class Board:
         if not self.can_hold or not self.current_piece:
             return
         
-        self.can_hold = False
         current_type = self.current_piece.type
         
         if self.hold_piece is None:
@@ -356,23 +634,121 @@ class Board:
             self.spawn_piece()
         else:
             self.hold_piece, temp = current_type, self.hold_piece
-            self.current_piece = Piece(temp, 3, 38)
+            self.current_piece = Piece(temp, self.spawn_x, self.spawn_y)
+            self.last_rotation = False
+        
+        # After spawn_piece, which would otherwise allow holding again
+        self.can_hold = False
+    
+    def add_garbage(self, lines: int, hole: int):
+        """Push garbage rows up from the bottom, all open at the hole column"""
+        self.push_garbage([hole] * lines)
+    
+    def garbage_row(self, hole: int) -> tuple:
+        row = self._garbage_rows.get(hole)
+        if row is None:
+            row = (GARBAGE_COLOR,) * hole + (None,) + (GARBAGE_COLOR,) * (self.width - hole - 1)
+            self._garbage_rows[hole] = row
+        return row
+    
+    def push_garbage(self, holes: List[int]):
+        """Push one garbage row per hole up from the bottom; the last one ends up lowest.
+        
+        However many rows arrive, each row list is shifted once with slice
+        operations rather than row by row.
+        """
+        count = len(holes)
+        height = self.height
+        if count > height:
+            # Rows pushed straight through the board
+            self.game_over = True
+            holes = holes[-height:]
+            count = height
+        if not count:
+            return
+        
+        # Anything pushed off the top tops out
+        top = height - count
+        row_fill = self.row_fill
+        pushed_off = sum(row_fill[top:])
+        if pushed_off:
+            self.game_over = True
+        
+        rows = [self.garbage_row(hole) for hole in reversed(holes)]
+        self.filled_cells += count * (self.width - 1) - pushed_off
+        grid = self.grid
+        frozen = self._rows
+        del grid[top:], frozen[top:], row_fill[top:]
+        grid[:0] = map(list, rows)
+        frozen[:0] = rows
+        row_fill[:0] = [self.width - 1] * count
+        self.rows_pushed += count
+        
+        # Keep the active piece clear of the rising stack
+        if self.current_piece:
+            while not self.is_valid_position(self.current_piece):
+                if self.current_piece.y + 1 >= self.height:
+                    self.game_over = True
+                    break
+                self.current_piece.y += 1
+    
+    def _is_blocked(self, x: int, y: int) -> bool:
+        if x < 0 or x >= self.width or y < 0 or y >= self.height:
+            return True
+        return self.grid[y][x] is not None
+    
+    def detect_spin(self) -> SpinType:
+        """Classify the current piece's position as a spin, before it locks"""
+        piece = self.current_piece
+        if not self.last_rotation or piece.type == 'O':
+            return SpinType.NONE
+        
+        if piece.type == 'T':
+            # 3-corner rule; both front corners (or the final kick) make it full
+            front, back = T_CORNERS[piece.rotation]
+            front_filled = sum(self._is_blocked(piece.x + x, piece.y + y) for x, y in front)
+            back_filled = sum(self._is_blocked(piece.x + x, piece.y + y) for x, y in back)
+            if front_filled + back_filled < 3:
+                return SpinType.NONE
+            if front_filled == 2 or self.last_kick == FINAL_KICK:
+                return SpinType.FULL
+            return SpinType.MINI
+        
+        # SRS+ all-spin: other pieces count as mini spins when they can't move
+        for cells in NEIGHBOR_CELLS[piece.type][piece.rotation]:
+            if not any(self._is_blocked(piece.x + x, piece.y + y) for x, y in cells):
+                return SpinType.NONE
+        return SpinType.MINI
     
-    def lock_piece(self):
+    def lock_piece(self, spin: Optional[SpinType] = None):
+        """Lock the current piece; spin overrides detection when re-simulating"""
         if not self.current_piece:
             return
         
+        piece = self.current_piece
+        self.last_placement = (piece.type, piece.rotation, piece.x, piece.y, not self.can_hold)
+        self.last_spin = spin if spin is not None else self.detect_spin()
+        
         # Place piece on board
+        touched_rows = set()
         for x, y in self.current_piece.get_blocks():
-            if 0 <= y < TOTAL_HEIGHT:
+            if 0 <= y < self.height:
                 self.grid[y][x] = self.current_piece.color
+                self.row_fill[y] += 1
+                self.filled_cells += 1
+                touched_rows.add(y)
+        
+        for y in touched_rows:
+            self._rows[y] = tuple(self.grid[y])
         
         self.pieces_placed += 1
         
-        # Clear lines and calculate attack
-        lines_cleared = self.clear_lines()
-        attack = self.calculate_attack(lines_cleared)
+        # Clear lines and calculate attack; only touched rows can have filled up
+        lines_cleared = self.clear_lines(touched_rows)
+        attack = self.calculate_attack(lines_cleared, self.last_spin)
         self.attack_sent += attack
+        self.last_lines = lines_cleared
+        self.last_attack = attack
         
         # Update combo
         if lines_cleared > 0:
@@ -382,22 +758,30 @@ class Board:
         
         # Spawn next piece
         self.spawn_piece()
+        
+        if self.on_lock:
+            self.on_lock()
     
-    def clear_lines(self) -> int:
-        lines_to_clear = []
+    def clear_lines(self, rows: Optional[set] = None) -> int:
+        """Clear full rows, checking only the given rows when they are known"""
+        if rows is None:
+            rows = range(self.height)
+        lines_to_clear = [y for y in rows if self.row_fill[y] == self.width]
         
-        # Check all rows for completed lines
-        for y in range(TOTAL_HEIGHT):
-            if all(self.grid[y][x] is not None for x in range(BOARD_WIDTH)):
-                lines_to_clear.append(y)
+        self.last_garbage_cleared = sum(GARBAGE_COLOR in self.grid[y] for y in lines_to_clear)
         
         # Remove cleared lines and shift everything down
         for y in sorted(lines_to_clear, reverse=True):
             del self.grid[y]
+            del self._rows[y]
+            del self.row_fill[y]
+        self.filled_cells -= len(lines_to_clear) * self.width
         
         # Add new empty lines at the top (buffer zone)
         for _ in range(len(lines_to_clear)):
-            self.grid.append([None for _ in range(BOARD_WIDTH)])
+            self.grid.append([None] * self.width)
+            self._rows.append(self.empty_row)
+            self.row_fill.append(0)
         
         lines_cleared = len(lines_to_clear)
         self.lines_cleared += lines_cleared
@@ -412,27 +796,20 @@ class Board:
         
         return lines_cleared
     
-    def calculate_attack(self, lines: int) -> int:
+    def calculate_attack(self, lines: int, spin: SpinType = SpinType.NONE) -> int:
         """Calculate attack based on modern Tetris attack table"""
         if lines == 0:
             return 0
         
         # Base attack values
-        attack_table = {
-            1: 0,  # Single
-            2: 1,  # Double
-            3: 2,  # Triple
-            4: 4   # Tetris
-        }
-        
-        base_attack = attack_table.get(lines, 0)
+        base_attack = ATTACK_TABLE[spin][min(lines, 4)]
         
         # Perfect clear bonus
-        if all(self.grid[y][x] is None for y in range(TOTAL_HEIGHT) for x in range(BOARD_WIDTH)):
+        if self.filled_cells == 0:
             base_attack += 10
         
-        # B2B bonus for Tetris and T-spins
-        if lines == 4:
+        # B2B bonus for Tetrises and spins; other clears break the chain
+        if lines == 4 or spin != SpinType.NONE:
             if self.b2b_count > 0:
                 base_attack += 1
             self.b2b_count += 1
@@ -440,10 +817,9 @@ class Board:
             self.b2b_count = 0
         
         # Combo bonus
-        combo_table = [0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 4, 5]
-        if self.combo_count > 0 and self.combo_count < len(combo_table):
-            base_attack += combo_table[self.combo_count]
-        elif self.combo_count >= len(combo_table):
+        if self.combo_count > 0 and self.combo_count < len(COMBO_TABLE):
+            base_attack += COMBO_TABLE[self.combo_count]
+        elif self.combo_count >= len(COMBO_TABLE):
             base_attack += 5
         
         return base_attack
@@ -470,6 +846,18 @@ class Board:
         if not self.is_locking and not self.is_valid_position(self.current_piece, 0, -1):
             self.is_locking = True
 
+# Actions on the active piece as (Board method, arguments)
+BOARD_ACTIONS = {
+    InputKey.LEFT: (Board.move_piece, (-1, 0)),
+    InputKey.RIGHT: (Board.move_piece, (1, 0)),
+    InputKey.SOFT_DROP: (Board.soft_drop, ()),
+    InputKey.HARD_DROP: (Board.hard_drop, ()),
+    InputKey.ROTATE_CW: (Board.rotate_piece, (1,)),
+    InputKey.ROTATE_CCW: (Board.rotate_piece, (-1,)),
+    InputKey.ROTATE_180: (Board.rotate_180, ()),
+    InputKey.HOLD: (Board.hold, ())
+}
+
 class InputHandler:
     def __init__(self, settings: Settings):
         self.settings = settings
@@ -477,28 +865,59 @@ class InputHandler:
         self.key_timers = {}
         self.das_charged = {}
         
+        # Key codes currently holding each action down
+        self.held_keys = {}
+        
+        for key in InputKey:
+            self.key_states[key] = False
+            self.key_timers[key] = 0
+            self.das_charged[key] = False
+            self.held_keys[key] = set()
+        
+        # Key code -> actions bound to it, rebuilt when the keybinds change
+        self.key_actions = {}
+        self.indexed = None
+    
+    def release_all(self):
         for key in InputKey:
             self.key_states[key] = False
             self.key_timers[key] = 0
             self.das_charged[key] = False
+            self.held_keys[key].clear()
+    
+    def rebuild_index(self):
+        self.key_actions = {}
+        for input_key, key_codes in self.settings.keybinds.items():
+            for key_code in key_codes:
+                self.key_actions.setdefault(key_code, []).append(input_key)
+        self.indexed = (self.settings, self.settings.keybind_version)
     
-    def handle_event(self, event):
-        if event.type == pygame.KEYDOWN:
-            for input_key, key_code in self.settings.keybinds.items():
-                if event.key == key_code:
+    def handle_events(self, events: List[pygame.event.Event]) -> List[InputKey]:
+        """Apply a batch of events to the held keys; returns the actions pressed, in order"""
+        if self.indexed != (self.settings, self.settings.keybind_version):
+            self.rebuild_index()
+        
+        pressed = []
+        for event in events:
+            if event.type == pygame.KEYDOWN:
+                for input_key in self.key_actions.get(event.key, ()):
+                    self.held_keys[input_key].add(event.key)
                     self.key_states[input_key] = True
                     self.key_timers[input_key] = 0
                     self.das_charged[input_key] = False
-                    return input_key
-        
-        elif event.type == pygame.KEYUP:
-            for input_key, key_code in self.settings.keybinds.items():
-                if event.key == key_code:
-                    self.key_states[input_key] = False
-                    self.key_timers[input_key] = 0
-                    self.das_charged[input_key] = False
+                    pressed.append(input_key)
+            
+            elif event.type == pygame.KEYUP:
+                for input_key in self.key_actions.get(event.key, ()):
+                    held = self.held_keys[input_key]
+                    held.discard(event.key)
+                    # Still held through another of its keys
+                    if not held:
+                        self.key_states[input_key] = False
+                        self.key_timers[input_key] = 0
+                        self.das_charged[input_key] = False
         
-        return None
+        return pressed
     
     def update(self, dt: float):
         actions = []
@@ -512,6 +931,12 @@ class InputHandler:
                         self.das_charged[input_key] = True
                         self.key_timers[input_key] = 0
                         actions.append(input_key)
+                elif input_key == InputKey.SOFT_DROP:
+                    # One cell per action at a rate set by SDF, however often update runs
+                    interval = 1000 / (SOFT_DROP_RATE * self.settings.sdf)
+                    while self.key_timers[input_key] >= interval:
+                        self.key_timers[input_key] -= interval
+                        actions.append(input_key)
                 else:
                     if self.settings.arr == 0:
                         actions.append(input_key)
@@ -521,31 +946,274 @@ class InputHandler:
         
         return actions
 
+def display_refresh_rate() -> int:
+    """Refresh rate of the current display, where pygame can report it"""
+    get_rate = getattr(pygame.display, "get_current_refresh_rate", None)  # pygame-ce
+    return (get_rate() if get_rate else 0) or DEFAULT_FPS
+
+def configure_events():
+    """Queue only the events the game and menus handle, so mouse movement and
+    the like never wake an idle window"""
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed([pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP,
+                              pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE])
+
+@lru_cache(maxsize=None)
+def get_font(size: int) -> pygame.font.Font:
+    """The default font at a size, loaded once per process and shared by every screen"""
+    return pygame.font.Font(None, size)
+
+class PracticeState(NamedTuple):
+    """What undo rewinds to, taken as each piece spawns"""
+    board: BoardSnapshot
+    sim_time_ns: int
+    stats: tuple
+    finesse: Optional[tuple]
+
 class Game:
-    def __init__(self):
+    def __init__(self, practice: bool = False, bot_command: Optional[List[str]] = None,
+                 replay_dir: Optional[str] = None, history_path: Optional[str] = "history.db",
+                 mode: str = "marathon", width: int = BOARD_WIDTH, height: int = TOTAL_HEIGHT,
+                 max_fps: Optional[int] = None, screen: Optional[pygame.Surface] = None,
+                 spectate_port: Optional[int] = None, mode_options: Optional[Dict] = None,
+                 settings: Optional[Settings] = None, offscreen: bool = False):
         pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Tetris SRS+")
+        
+        # An offscreen game draws onto screen without a window, e.g. for video
+        # export; otherwise a given screen belongs to a launcher's window
+        if offscreen and screen is None:
+            raise ValueError("An offscreen game needs a surface to draw on")
+        self.offscreen = offscreen
+        if screen is None:
+            screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+            pygame.display.set_caption("Tetris SRS+")
+            configure_events()
+        self.screen = screen
         
         self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 24)
-        self.small_font = pygame.font.Font(None, 18)
+        self.font = get_font(24)
+        self.small_font = get_font(18)
         
-        self.settings = Settings()
-        self.settings.load()
+        # Shared with a launcher's settings menu, so changes apply immediately
+        if settings is None:
+            settings = Settings()
+            settings.load()
+        self.settings = settings
         
-        self.board = Board()
         self.input_handler = InputHandler(self.settings)
         
+        # Actions that work whether or not a piece is in play
+        self.game_actions = {
+            InputKey.PAUSE: self.toggle_pause,
+            InputKey.RESTART: self.restart,
+            InputKey.UNDO: self.undo,
+            InputKey.REDO: self.redo,
+            InputKey.SETTINGS: self.open_settings
+        }
+        # Called to show the settings menu; only a launcher provides one
+        self.on_settings = None
+        
+        # Practice mode keeps one snapshot per placed piece for undo/redo
+        self.practice = practice
+        self.undo_stack = deque(maxlen=UNDO_LIMIT)
+        self.redo_stack = []
+        self.piece_start = None
+        
+        # External bot driving the active piece; undo would put it out of sync
+        if bot_command and practice:
+            raise ValueError("Practice mode can't be played by a bot")
+        self.bot = None
+        self.bot_error = None
+        if bot_command:
+            from tetris_bot import BotController, BotError
+            try:
+                self.bot = BotController(bot_command)
+            except BotError as e:
+                self.bot_error = str(e)
+        
+        self.board_size = (width, height)
+        
+        # Sprint, ultra and cheese race; marathon has no goal
+        from tetris_modes import MODES
+        self.mode = MODES[mode](**(mode_options or {}))
+        
+        # Finished games are appended to replay archives; practice games are
+        # skipped since undo would leave them out of sync
+        self.recorder = None
+        if replay_dir and not practice and self.mode.replayable:
+            from tetris_replay import ReplayRecorder
+            self.recorder = ReplayRecorder(replay_dir)
+        
+        # Rolling-window pace, reset with each board
+        self.stats = StatsRecorder()
+        
+        # Finished games are saved to SQLite by a background writer
+        self.history = None
+        if history_path:
+            from tetris_history import HistoryStore
+            self.history = HistoryStore(history_path)
+        self.piece_splits = []
+        self.game_ended = False
+        
+        # Live board for viewers on localhost, encoded on the server's own thread
+        self.spectators = None
+        if spectate_port is not None:
+            from tetris_spectator import SpectatorServer
+            self.spectators = SpectatorServer(port=spectate_port)
+        
+        # Finesse is judged for human play only
+        self.finesse = None
+        if not self.bot and not self.offscreen:
+            from tetris_finesse import FinesseTracker, load_table
+            self.finesse = FinesseTracker(load_table(width=width, height=height))
+        
+        self.board = None
+        self.new_board()
+        
         self.paused = False
         self.running = True
+        self.was_playing = False
+        # Set when something changed the frame while idle; only then is it redrawn
+        self.dirty = True
+        self.last_frame_ns = time.perf_counter_ns()
         
         # Timing stats
-        self.start_time = time.time()
         self.frame_times = []
+        
+        # Frame pacing: the cap follows the display, and drops while frames take
+        # too long to keep up
+        self.max_fps = max(MIN_FPS, min(MAX_FPS, max_fps or display_refresh_rate()))
+        self.fps_cap = self.max_fps
+        self.frame_work_ns = 0
+    
+    def new_board(self):
+        if self.board:
+            self.end_game()
+        
+        width, height = self.board_size
+        self.board = Board(width=width, height=height)
+        self.board.on_lock = self.on_piece_locked
+        self.layout_board()
+        
+        # Simulation clock, advanced only by fixed ticks
+        self.sim_time_ns = 0
+        self.tick_accumulator_ns = 0
+        self.stats.reset(0.0)
+        self.piece_splits = []
+        self.game_ended = False
+        
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.piece_start = self.practice_state() if self.practice else None
+        
+        self.mode.start(self.board)
+        if self.bot and not self.bot_error:
+            self.call_bot(self.bot.start, self.board)
+        if self.recorder:
+            self.recorder.start(self.board)
+        if self.finesse:
+            self.finesse.reset_piece()
+    
+    def call_bot(self, method, *args):
+        """Call into the bot; if it fails, it is stopped and the error shown instead of raised"""
+        from tetris_bot import BotError
+        try:
+            method(*args)
+        except BotError as e:
+            self.bot_error = str(e)
+            self.bot.close()
+    
+    def toggle_pause(self):
+        self.paused = not self.paused
+    
+    def open_settings(self):
+        if self.on_settings:
+            self.paused = True
+            self.on_settings()
+    
+    def resume(self):
+        """Back on screen after another scene: keys released meanwhile were never seen"""
+        self.input_handler.release_all()
+        self.dirty = True
+        self.draw()
+    
+    def restart(self):
+        self.new_board()
+        self.paused = False
+    
+    @property
+    def playing(self) -> bool:
+        return (not self.paused and not self.board.game_over and not self.mode.finished
+                and not self.bot_error)
+    
+    def on_piece_locked(self):
+        self.mode.on_lock(self.board, self.sim_time_ns)
+        
+        elapsed_ms = self.sim_time_ns / 1_000_000
+        if self.recorder:
+            self.recorder.record(self.board, elapsed_ms)
+        if self.finesse:
+            self.finesse.on_lock(self.board)
+        
+        board = self.board
+        self.stats.record(self.sim_time_ns / 1e9, board.last_lines, board.last_attack,
+                          board.last_garbage_cleared, SPIN_CODES[board.last_spin], board.combo_count)
+        # Splits past the pieces on the board were undone; redo would have reused them
+        del self.piece_splits[board.pieces_placed - 1:]
+        self.piece_splits.append((int(elapsed_ms), board.last_lines, board.last_attack))
+        
+        if self.practice:
+            self.undo_stack.append(self.piece_start)
+            self.redo_stack.clear()
+            self.piece_start = self.practice_state()
+    
+    def end_game(self):
+        """Save the finished game's replay and history, once"""
+        if self.game_ended:
+            return
+        self.game_ended = True
+        
+        if self.recorder:
+            self.recorder.finish(self.board)
+        # Timed runs only count once they reach the finish
+        if self.history and self.board.pieces_placed and (self.mode.endless or self.mode.finished):
+            mode = "bot" if self.bot else "practice" if self.practice else self.mode.name
+            self.history.record_game(mode, self.calculate_stats(), self.board.game_over,
+                                     self.settings.to_dict(), self.piece_splits[:self.board.pieces_placed])
+    
+    def practice_state(self) -> PracticeState:
+        return PracticeState(self.board.snapshot(), self.sim_time_ns, self.stats.snapshot(),
+                             self.finesse.snapshot() if self.finesse else None)
+    
+    def restore_practice_state(self, state: PracticeState):
+        """Rewind the board, clock, pace and finesse stats to a piece's spawn"""
+        self.board.restore(state.board)
+        self.sim_time_ns = state.sim_time_ns
+        self.tick_accumulator_ns = 0
+        self.stats.restore(state.stats)
+        if self.finesse:
+            self.finesse.restore(state.finesse)
+    
+    def undo(self):
+        """Take back the last placed piece (practice mode only)"""
+        if not self.practice or not self.undo_stack:
+            return
+        
+        self.redo_stack.append(self.piece_start)
+        self.piece_start = self.undo_stack.pop()
+        self.restore_practice_state(self.piece_start)
+    
+    def redo(self):
+        """Replay a piece removed by undo() (practice mode only)"""
+        if not self.practice or not self.redo_stack:
+            return
+        
+        self.undo_stack.append(self.piece_start)
+        self.piece_start = self.redo_stack.pop()
+        self.restore_practice_state(self.piece_start)
     
     def calculate_stats(self):
-        elapsed_time = time.time() - self.start_time
+        elapsed_time = self.sim_time_ns / 1e9
         
         # PPS (Pieces Per Second)
         pps = self.board.pieces_placed / elapsed_time if elapsed_time > 0 else 0
@@ -553,6 +1221,9 @@ class Game:
         # APM (Attack Per Minute)
         apm = (self.board.attack_sent / elapsed_time) * 60 if elapsed_time > 0 else 0
         
+        # Current pace over the stats window
+        pace_pps, pace_apm, pace_vs = self.stats.rates(elapsed_time)
+        
         return {
             "time": elapsed_time,
             "pps": pps,
@@ -561,76 +1232,113 @@ class Game:
             "attack": self.board.attack_sent,
             "level": self.board.level,
             "score": self.board.score,
+            "pieces": self.board.pieces_placed,
             "combo": self.board.combo_count,
-            "b2b": self.board.b2b_count
+            "b2b": self.board.b2b_count,
+            "pace_pps": pace_pps,
+            "pace_apm": pace_apm,
+            "pace_vs": pace_vs
         }
     
+    def layout_board(self):
+        """Scale cells so the visible rows fit the board area, and reset the row cache"""
+        board = self.board
+        self.cell_size = max(1, min(CELL_SIZE, BOARD_AREA_WIDTH // board.width,
+                                    BOARD_AREA_HEIGHT // board.visible_height))
+        self.cell_inset = 1 if self.cell_size >= 6 else 0  # Room for grid lines
+        
+        self.board_rect = pygame.Rect(0, 0, board.width * self.cell_size, board.visible_height * self.cell_size)
+        self.board_rect.center = (BOARD_X + BOARD_AREA_WIDTH // 2, BOARD_Y + BOARD_AREA_HEIGHT // 2)
+        
+        # Placed cells are drawn onto a cached surface; each frame only the rows
+        # that changed are redrawn
+        self.board_surface = pygame.Surface(self.board_rect.size)
+        self.drawn_rows = [None] * board.visible_height
+        self.drawn_pushed = board.rows_pushed
+        
+        self.empty_row_surface = pygame.Surface((self.board_rect.width, self.cell_size))
+        self.empty_row_surface.fill(DARK_GRAY)
+        if self.cell_inset:
+            for x in range(board.width + 1):
+                pygame.draw.line(self.empty_row_surface, GRAY, (x * self.cell_size, 0),
+                                 (x * self.cell_size, self.cell_size), 1)
+            pygame.draw.line(self.empty_row_surface, GRAY, (0, 0), (self.board_rect.width, 0), 1)
+    
+    def cell_rect(self, x: int, y: int) -> Optional[pygame.Rect]:
+        """Screen rectangle of a board cell, or None if it is above the visible rows"""
+        screen_y = self.board.visible_height - 1 - y
+        if not 0 <= screen_y < self.board.visible_height:
+            return None
+        return pygame.Rect(self.board_rect.x + x * self.cell_size + self.cell_inset,
+                           self.board_rect.y + screen_y * self.cell_size + self.cell_inset,
+                           self.cell_size - 2 * self.cell_inset, self.cell_size - 2 * self.cell_inset)
+    
+    def draw_board_row(self, y: int, row: tuple):
+        screen_y = (self.board.visible_height - 1 - y) * self.cell_size
+        self.board_surface.blit(self.empty_row_surface, (0, screen_y))
+        
+        size = self.cell_size - 2 * self.cell_inset
+        for x, color in enumerate(row):
+            if color is not None:
+                self.board_surface.fill(color, (x * self.cell_size + self.cell_inset,
+                                                screen_y + self.cell_inset, size, size))
+    
     def draw_board(self):
-        # Draw board background
-        board_rect = pygame.Rect(BOARD_X, BOARD_Y, BOARD_WIDTH * CELL_SIZE, VISIBLE_HEIGHT * CELL_SIZE)
-        pygame.draw.rect(self.screen, DARK_GRAY, board_rect)
-        pygame.draw.rect(self.screen, WHITE, board_rect, 2)
-        
-        # Draw grid lines
-        for x in range(BOARD_WIDTH + 1):
-            pygame.draw.line(self.screen, GRAY, 
-                           (BOARD_X + x * CELL_SIZE, BOARD_Y),
-                           (BOARD_X + x * CELL_SIZE, BOARD_Y + VISIBLE_HEIGHT * CELL_SIZE), 1)
-        
-        for y in range(VISIBLE_HEIGHT + 1):
-            pygame.draw.line(self.screen, GRAY,
-                           (BOARD_X, BOARD_Y + y * CELL_SIZE),
-                           (BOARD_X + BOARD_WIDTH * CELL_SIZE, BOARD_Y + y * CELL_SIZE), 1)
-        
-        # Draw placed pieces
-        for y in range(TOTAL_HEIGHT):
-            for x in range(BOARD_WIDTH):
-                if self.board.grid[y][x] is not None:
-                    # Convert from grid coordinates to screen coordinates
-                    screen_y = TOTAL_HEIGHT - 1 - y
-                    if screen_y < VISIBLE_HEIGHT:
-                        rect = pygame.Rect(BOARD_X + x * CELL_SIZE + 1,
-                                         BOARD_Y + screen_y * CELL_SIZE + 1,
-                                         CELL_SIZE - 2, CELL_SIZE - 2)
-                        pygame.draw.rect(self.screen, self.board.grid[y][x], rect)
+        # Garbage moves the whole stack up; scroll what is drawn to match, so
+        # only the new rows at the bottom need drawing
+        pushed = self.board.rows_pushed - self.drawn_pushed
+        if pushed:
+            self.drawn_pushed = self.board.rows_pushed
+            visible = self.board.visible_height
+            if pushed < visible:
+                self.board_surface.scroll(0, -pushed * self.cell_size)
+                self.drawn_rows[:] = [None] * pushed + self.drawn_rows[:visible - pushed]
+            else:
+                self.drawn_rows[:] = [None] * visible
+        
+        # Rows are immutable and replaced when they change, so an identity
+        # check finds the ones to redraw
+        rows = self.board.rows
+        for y in range(self.board.visible_height):
+            if rows[y] is not self.drawn_rows[y]:
+                self.draw_board_row(y, rows[y])
+                self.drawn_rows[y] = rows[y]
+        
+        self.screen.blit(self.board_surface, self.board_rect)
+        pygame.draw.rect(self.screen, WHITE, self.board_rect, 2)
+        
+        piece = self.board.current_piece
+        if not piece:
+            return
         
         # Draw ghost piece
-        if self.board.current_piece:
-            ghost_y = self.board.current_piece.y
-            while self.board.is_valid_position(self.board.current_piece, 0, ghost_y - self.board.current_piece.y - 1):
-                ghost_y -= 1
-            
-            for x, y in self.board.current_piece.get_blocks():
-                final_y = y + (ghost_y - self.board.current_piece.y)
-                screen_y = TOTAL_HEIGHT - 1 - final_y
-                if 0 <= screen_y < VISIBLE_HEIGHT:
-                    rect = pygame.Rect(BOARD_X + x * CELL_SIZE + 1,
-                                     BOARD_Y + screen_y * CELL_SIZE + 1,
-                                     CELL_SIZE - 2, CELL_SIZE - 2)
-                    s = pygame.Surface((CELL_SIZE - 2, CELL_SIZE - 2))
-                    s.set_alpha(64)
-                    s.fill(self.board.current_piece.color)
-                    self.screen.blit(s, rect)
+        drop = 0
+        while self.board.is_valid_position(piece, 0, -drop - 1):
+            drop += 1
+        
+        for x, y in piece.get_blocks():
+            rect = self.cell_rect(x, y - drop)
+            if rect:
+                s = pygame.Surface(rect.size)
+                s.set_alpha(64)
+                s.fill(piece.color)
+                self.screen.blit(s, rect)
         
         # Draw current piece
-        if self.board.current_piece:
-            for x, y in self.board.current_piece.get_blocks():
-                screen_y = TOTAL_HEIGHT - 1 - y
-                if 0 <= screen_y < VISIBLE_HEIGHT:
-                    rect = pygame.Rect(BOARD_X + x * CELL_SIZE + 1,
-                                     BOARD_Y + screen_y * CELL_SIZE + 1,
-                                     CELL_SIZE - 2, CELL_SIZE - 2)
-                    pygame.draw.rect(self.screen, self.board.current_piece.color, rect)
+        for x, y in piece.get_blocks():
+            rect = self.cell_rect(x, y)
+            if rect:
+                pygame.draw.rect(self.screen, piece.color, rect)
     
     def draw_next_pieces(self):
-        next_x = BOARD_X + BOARD_WIDTH * CELL_SIZE + 30
+        next_x = BOARD_X + BOARD_AREA_WIDTH + 30
         next_y = BOARD_Y
         
         text = self.font.render("NEXT", True, WHITE)
         self.screen.blit(text, (next_x, next_y))
         
         y_offset = 30
-        for piece_type in self.board.next_pieces[:5]:
+        for piece_type in self.board.next_pieces:
             shape = PIECES[piece_type][0]
             color = PIECE_COLORS[piece_type]
             
@@ -668,7 +1376,8 @@ class Game:
         stats_y = 200
         
         stats_text = [
-            f"Time: {int(stats['time'])}s",
+            self.mode.status_text(self.board),
+            f"Time: {self.mode.clock_text(self.sim_time_ns)}",
             f"Score: {stats['score']:,}",
             f"Level: {stats['level']}",
             f"Lines: {stats['lines']}",
@@ -686,34 +1395,93 @@ class Game:
                 rendered = self.small_font.render(text, True, WHITE)
                 self.screen.blit(rendered, (stats_x, stats_y + i * 20))
     
+    def draw_pace(self):
+        pps, apm, vs = self.stats.rates(self.sim_time_ns / 1e9)
+        pace_x = BOARD_X + BOARD_AREA_WIDTH + 140
+        pace_y = BOARD_Y
+        
+        text = self.font.render("PACE", True, WHITE)
+        self.screen.blit(text, (pace_x, pace_y))
+        
+        pace_text = [
+            f"Last {self.stats.window:.0f}s",
+            f"PPS: {pps:.2f}",
+            f"APM: {apm:.1f}",
+            f"VS: {vs:.1f}"
+        ]
+        
+        if self.finesse:
+            pace_text += [
+                f"",
+                f"Finesse: {self.finesse.rate:.1f}%",
+                f"Faults: {self.finesse.faults}"
+            ]
+            if self.finesse.last_fault:
+                piece_type, path = self.finesse.last_fault
+                pace_text.append(f"{piece_type}: {' '.join(path) or 'drop'}")
+        
+        for i, text in enumerate(pace_text):
+            if text:
+                rendered = self.small_font.render(text, True, WHITE)
+                self.screen.blit(rendered, (pace_x, pace_y + 30 + i * 20))
+        
+        # Histogram of time per piece
+        histogram_y = pace_y + 30 + len(pace_text) * 20 + 30
+        rendered = self.small_font.render("Piece time", True, LIGHT_GRAY)
+        self.screen.blit(rendered, (pace_x, histogram_y - 20))
+        
+        counts = self.stats.latency_bins
+        tallest = max(counts)
+        if tallest:
+            for i, count in enumerate(counts):
+                height = count * 60 // tallest
+                pygame.draw.rect(self.screen, CYAN, (pace_x + i * 3, histogram_y + 60 - height, 2, height))
+    
     def draw_controls(self):
         controls_x = 20
         controls_y = 450
         
+        # Paired up so the block fits between the stats and the bottom edge
         controls_text = [
             "Controls:",
-            "← → - Move",
-            "↓ - Soft Drop",
-            "Space - Hard Drop",
-            "↑ - Rotate CW",
-            "Z - Rotate CCW",
-            "A - Rotate 180°",
-            "C - Hold",
-            "ESC - Pause",
-            "R - Restart"
+            "← → - Move, ↓ - Soft Drop",
+            "Space - Hard Drop, C - Hold",
+            "↑ / Z / A - Rotate CW / CCW / 180°",
+            "ESC - Pause, R - Restart"
         ]
         
+        if self.practice:
+            controls_text.append("U / Y - Undo / Redo")
+        
         for i, text in enumerate(controls_text):
             rendered = self.small_font.render(text, True, LIGHT_GRAY)
             self.screen.blit(rendered, (controls_x, controls_y + i * 18))
     
-    def draw(self):
+    def draw_breakdown(self):
+        lines = self.mode.breakdown(self.board, self.sim_time_ns)
+        top = SCREEN_HEIGHT // 2 - (len(lines) * 20 + 60) // 2
+        
+        panel = pygame.Rect(BOARD_X, top - 10, BOARD_AREA_WIDTH, len(lines) * 20 + 80)
+        pygame.draw.rect(self.screen, BLACK, panel)
+        pygame.draw.rect(self.screen, WHITE, panel, 2)
+        
+        title = self.font.render("FINISHED", True, GREEN)
+        self.screen.blit(title, title.get_rect(center=(SCREEN_WIDTH // 2, top + 10)))
+        
+        for i, text in enumerate(lines + ["", "Press R to restart"]):
+            if text:
+                rendered = self.small_font.render(text, True, WHITE)
+                self.screen.blit(rendered, rendered.get_rect(center=(SCREEN_WIDTH // 2, top + 40 + i * 20)))
+    
+    def render(self):
+        """Draw the whole frame onto the screen surface"""
         self.screen.fill(BLACK)
         
         self.draw_board()
         self.draw_next_pieces()
         self.draw_hold_piece()
         self.draw_stats()
+        self.draw_pace()
         self.draw_controls()
         
         if self.paused:
@@ -721,6 +1489,12 @@ class Game:
             text_rect = pause_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
             self.screen.blit(pause_text, text_rect)
         
+        if self.bot_error:
+            stopped_text = self.font.render("BOT STOPPED", True, RED)
+            error_text = self.small_font.render(self.bot_error[:60], True, WHITE)
+            self.screen.blit(stopped_text, stopped_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 70)))
+            self.screen.blit(error_text, error_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 40)))
+        
         if self.board.game_over:
             game_over_text = self.font.render("GAME OVER", True, RED)
             restart_text = self.small_font.render("Press R to restart", True, WHITE)
@@ -730,7 +1504,11 @@ class Game:
             
             self.screen.blit(game_over_text, game_over_rect)
             self.screen.blit(restart_text, restart_rect)
-        
+        elif self.mode.finished:
+            self.draw_breakdown()
+    
+    def draw(self):
+        self.render()
         pygame.display.flip()
     
     def handle_input(self, dt: float):
@@ -738,66 +1516,163 @@ class Game:
         actions = self.input_handler.update(dt)
         
         for action in actions:
-            if action == InputKey.LEFT:
-                self.board.move_piece(-1, 0)
-            elif action == InputKey.RIGHT:
-                self.board.move_piece(1, 0)
-            elif action == InputKey.SOFT_DROP:
-                # Apply SDF multiplier
-                for _ in range(self.settings.sdf):
-                    if self.board.soft_drop() == 0:
-                        break
+            method, args = BOARD_ACTIONS[action]
+            method(self.board, *args)
     
-    def run(self):
-        while self.running:
-            dt = self.clock.tick(60)  # 60 FPS
-            
-            # Handle events
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                
-                # Handle single-press actions
-                action = self.input_handler.handle_event(event)
-                
-                if action == InputKey.PAUSE:
-                    self.paused = not self.paused
-                elif action == InputKey.RESTART:
-                    self.board = Board()
-                    self.start_time = time.time()
-                    self.paused = False
-                
-                if not self.paused and not self.board.game_over:
-                    # These actions should trigger on key press
-                    if action == InputKey.LEFT:
-                        self.board.move_piece(-1, 0)
-                    elif action == InputKey.RIGHT:
-                        self.board.move_piece(1, 0)
-                    elif action == InputKey.SOFT_DROP:
-                        self.board.soft_drop()
-                    elif action == InputKey.HARD_DROP:
-                        self.board.hard_drop()
-                    elif action == InputKey.ROTATE_CW:
-                        self.board.rotate_piece(1)
-                    elif action == InputKey.ROTATE_CCW:
-                        self.board.rotate_piece(-1)
-                    elif action == InputKey.ROTATE_180:
-                        self.board.rotate_180()
-                    elif action == InputKey.HOLD:
-                        self.board.hold()
-            
-            # Update game state
-            if not self.paused and not self.board.game_over:
-                self.handle_input(dt)
-                self.board.update(dt, self.settings)
-            
-            # Draw everything
+    def step(self):
+        """Advance the simulation by one fixed tick"""
+        self.sim_time_ns += SIM_TICK_NS
+        # A bot places and locks its pieces itself; gravity and lock delay
+        # would lock them while it is still thinking
+        if not self.bot:
+            self.handle_input(SIM_TICK_NS / 1_000_000)
+            self.board.update(SIM_TICK_NS / 1_000_000, self.settings)
+        self.mode.tick(self.board, self.sim_time_ns)
+    
+    def pace_frame(self, work_ns: int):
+        """Adjust the frame cap to how long update and draw have been taking"""
+        self.frame_work_ns += (work_ns - self.frame_work_ns) // 8
+        if self.frame_work_ns > 0:
+            affordable = int(1_000_000_000 * FRAME_BUDGET / self.frame_work_ns)
+            self.fps_cap = max(MIN_FPS, min(self.max_fps, affordable))
+    
+    def poll_events(self) -> List[pygame.event.Event]:
+        """Wait for the next frame and return its events"""
+        self.was_playing = self.playing
+        if self.was_playing:
+            self.clock.tick(self.fps_cap)
+            return pygame.event.get()
+        # Nothing moves while paused or after the game ends, so sleep until an
+        # event arrives instead of redrawing the same frame
+        return [pygame.event.wait()] + pygame.event.get()
+    
+    def frame(self, events: List[pygame.event.Event]):
+        """Handle one frame's events, advance the simulation and draw"""
+        now_ns = time.perf_counter_ns()
+        # Time spent idle is not simulated
+        frame_ns = min(now_ns - self.last_frame_ns, MAX_FRAME_NS) if self.was_playing else 0
+        self.last_frame_ns = now_ns
+        
+        # Handle events
+        for event in events:
+            if event.type == pygame.QUIT:
+                self.running = False
+            elif event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                self.dirty = True
+        
+        for action in self.input_handler.handle_events(events):
+            if action in self.game_actions:
+                self.game_actions[action]()
+                self.dirty = True
+            elif self.playing and not self.bot:
+                if self.finesse:
+                    self.finesse.on_press(action)
+                method, args = BOARD_ACTIONS[action]
+                method(self.board, *args)
+                self.dirty = True
+        
+        # Update game state in fixed ticks, so timing doesn't depend on the
+        # frame rate
+        bot_ns = 0
+        if self.playing:
+            if self.bot:
+                # The bot gets part of the frame; its unanswered request waits
+                # for the next one instead of freezing the window
+                bot_start_ns = time.perf_counter_ns()
+                self.call_bot(self.bot.poll, FRAME_BUDGET / self.fps_cap)
+                bot_ns = time.perf_counter_ns() - bot_start_ns
+            self.tick_accumulator_ns += frame_ns
+            while self.tick_accumulator_ns >= SIM_TICK_NS and self.playing:
+                self.tick_accumulator_ns -= SIM_TICK_NS
+                self.step()
+        
+        if self.board.game_over or self.mode.finished:
+            self.end_game()
+        
+        if self.spectators:
+            self.spectators.publish(0, self.board, self.sim_time_ns)
+        
+        # Draw everything, unless idle and nothing has changed the frame
+        if self.was_playing or self.playing or self.dirty:
             self.draw()
+            self.dirty = False
         
-        # Save settings on exit
+        if self.was_playing:
+            # Waiting for the bot is not work the frame rate has to make room for
+            self.pace_frame(time.perf_counter_ns() - now_ns - bot_ns)
+    
+    def close(self):
+        """Save settings and stop everything the game started, leaving pygame running"""
         self.settings.save()
+        if self.bot:
+            self.bot.close()
+        self.end_game()
+        if self.history:
+            self.history.close()
+        if self.spectators:
+            self.spectators.close()
+    
+    def run(self):
+        self.last_frame_ns = time.perf_counter_ns()
+        while self.running:
+            self.frame(self.poll_events())
+        
+        self.close()
+        get_font.cache_clear()
         pygame.quit()
 
+def add_game_arguments(parser: argparse.ArgumentParser):
+    """Options of every entry point that starts a Game; read them back with game_options()"""
+    parser.add_argument("--mode", choices=["marathon", "sprint", "ultra", "cheese", "survival"],
+                        default="marathon",
+                        help="Marathon, 40-line sprint, 2-minute ultra, cheese race or garbage survival")
+    parser.add_argument("--level", type=int, default=None, help="Survival starting level")
+    parser.add_argument("--messiness", type=float, default=None,
+                        help="Survival chance (0-1) that each garbage row's hole moves")
+    parser.add_argument("--width", type=int, default=BOARD_WIDTH, help="Board width in cells")
+    parser.add_argument("--height", type=int, default=TOTAL_HEIGHT, help="Board height in cells, buffer included")
+    parser.add_argument("--practice", action="store_true", help="Enable undo/redo")
+    parser.add_argument("--bot", help="Command line of an external bot to play the game")
+    parser.add_argument("--replays", metavar="DIR", help="Save finished games to replay archives in DIR")
+    parser.add_argument("--history", metavar="PATH", default="history.db",
+                        help="SQLite database of finished games (empty to disable)")
+    parser.add_argument("--fps", type=int, default=None,
+                        help=f"Frame rate cap (default: the display's refresh rate, or {DEFAULT_FPS})")
+    parser.add_argument("--spectate", metavar="PORT", type=int, nargs="?", const=7400,
+                        help="Stream the board to viewers on localhost (default port 7400)")
+
+def game_options(parser: argparse.ArgumentParser, args: argparse.Namespace) -> Dict:
+    """Game keyword arguments from add_game_arguments() options, exiting through parser if they clash"""
+    if args.practice and args.mode != "marathon":
+        parser.error("--practice only works in marathon mode")
+    if args.practice and args.bot:
+        parser.error("--practice can't be combined with --bot")
+    
+    mode_options = {}
+    if args.level is not None:
+        mode_options["level"] = args.level
+    if args.messiness is not None:
+        mode_options["messiness"] = args.messiness
+    if mode_options and args.mode != "survival":
+        parser.error("--level and --messiness only work in survival mode")
+    
+    return {
+        "practice": args.practice,
+        "bot_command": shlex.split(args.bot) if args.bot else None,
+        "replay_dir": args.replays,
+        "history_path": args.history,
+        "mode": args.mode,
+        "width": args.width,
+        "height": args.height,
+        "max_fps": args.fps,
+        "spectate_port": args.spectate,
+        "mode_options": mode_options
+    }
+
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser(description="Tetris SRS+")
+    add_game_arguments(parser)
+    args = parser.parse_args()
+    
+    game = Game(**game_options(parser, args))
     game.run()
\ No newline at end of file
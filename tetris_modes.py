@@ -0,0 +1,209 @@
+import random
+from typing import List, Optional
+
+from tetris_main import Board, GARBAGE_COLOR
+
+SPLIT_LINES = 10  # a split is taken every this many lines
+SPRINT_LINES = 40
+ULTRA_TIME_NS = 120 * 1_000_000_000
+CHEESE_LINES = 18  # garbage lines to dig through
+CHEESE_HEIGHT = 10  # garbage rows kept on the board while any are left
+SURVIVAL_LEVEL_NS = 30 * 1_000_000_000  # time per survival level
+SURVIVAL_BASE_RATE = 0.25  # garbage rows per second at level 1
+SURVIVAL_RATE_GROWTH = 1.4  # rate multiplier per level; past level 12 or so it outruns anyone
+SURVIVAL_MESSINESS = 0.3  # chance each garbage row's hole moves
+
+def format_time_ns(ns: int) -> str:
+    """m:ss.mmm, truncated to the millisecond"""
+    ms = ns // 1_000_000
+    return f"{ms // 60000}:{ms // 1000 % 60:02d}.{ms % 1000:03d}"
+
+class GameMode:
+    """Marathon: no goal, play until the stack tops out.
+    
+    Modes are told the simulation time of every lock and tick, so splits and
+    finish times come from the fixed-step clock rather than the frame rate.
+    """
+    name = "marathon"
+    title = "Marathon"
+    goal: Optional[int] = None
+    endless = True  # no finish; the run only ends by topping out
+    replayable = True  # whether a replay of the placements alone reproduces the game
+    
+    def __init__(self):
+        self.splits: List[int] = []
+        self.finished_ns: Optional[int] = None
+    
+    def start(self, board: Board):
+        self.splits = []
+        self.finished_ns = None
+    
+    @property
+    def finished(self) -> bool:
+        return self.finished_ns is not None
+    
+    def progress(self, board: Board) -> int:
+        return board.lines_cleared
+    
+    def on_lock(self, board: Board, time_ns: int):
+        progress = self.progress(board)
+        if self.goal is not None:
+            progress = min(progress, self.goal)
+        
+        # One big clear can pass more than one split
+        while len(self.splits) < progress // SPLIT_LINES:
+            self.splits.append(time_ns)
+        
+        if self.goal is not None and progress >= self.goal:
+            self.finished_ns = time_ns
+    
+    def tick(self, board: Board, time_ns: int):
+        pass
+    
+    def clock_text(self, time_ns: int) -> str:
+        return format_time_ns(self.finished_ns if self.finished else time_ns)
+    
+    def status_text(self, board: Board) -> str:
+        return self.title
+    
+    def breakdown(self, board: Board, time_ns: int) -> List[str]:
+        """End-of-run summary: each split with its segment time, then totals"""
+        end_ns = self.finished_ns if self.finished else time_ns
+        lines = []
+        previous = 0
+        for i, split_ns in enumerate(self.splits):
+            lines.append(f"{(i + 1) * SPLIT_LINES:>3}  {format_time_ns(split_ns)}"
+                         f"  (+{format_time_ns(split_ns - previous)})")
+            previous = split_ns
+        
+        seconds = end_ns / 1e9
+        pps = board.pieces_placed / seconds if seconds > 0 else 0
+        lines.append(f"Time {format_time_ns(end_ns)}  Pieces {board.pieces_placed}  PPS {pps:.2f}")
+        return lines
+
+class Sprint(GameMode):
+    """Clear 40 lines as fast as possible"""
+    name = "sprint"
+    title = "Sprint"
+    goal = SPRINT_LINES
+    endless = False
+    
+    def status_text(self, board: Board) -> str:
+        return f"{self.title}: {max(0, self.goal - board.lines_cleared)} left"
+
+class Ultra(GameMode):
+    """Score as much as possible in two minutes"""
+    name = "ultra"
+    title = "Ultra"
+    endless = False
+    
+    def tick(self, board: Board, time_ns: int):
+        if not self.finished and time_ns >= ULTRA_TIME_NS:
+            self.finished_ns = ULTRA_TIME_NS
+    
+    def clock_text(self, time_ns: int) -> str:
+        # Counts down
+        return format_time_ns(max(0, ULTRA_TIME_NS - (self.finished_ns or time_ns)))
+    
+    def status_text(self, board: Board) -> str:
+        return f"{self.title}: {board.score:,}"
+    
+    def breakdown(self, board: Board, time_ns: int) -> List[str]:
+        return super().breakdown(board, time_ns) + [f"Score {board.score:,}  Lines {board.lines_cleared}"]
+
+class CheeseRace(GameMode):
+    """Dig through 18 garbage lines, refilled from below up to 10 at a time"""
+    name = "cheese"
+    title = "Cheese"
+    goal = CHEESE_LINES
+    endless = False
+    replayable = False  # the garbage isn't part of the replay format
+    
+    def start(self, board: Board):
+        super().start(board)
+        # Seeded from the piece sequence so a seed always gives the same cheese
+        self.rng = random.Random(board.sequence.seed)
+        self.hole = None
+        self.cleared = 0
+        self.refill(board)
+    
+    def refill(self, board: Board):
+        on_board = sum(GARBAGE_COLOR in row for row in board.rows)
+        wanted = min(CHEESE_HEIGHT, self.goal - self.cleared)
+        holes = []
+        for _ in range(wanted - on_board):
+            # Every row's hole is in a different column from the row above it
+            if self.hole is None:
+                self.hole = self.rng.randrange(board.width)
+            else:
+                self.hole = (self.hole + self.rng.randrange(1, board.width)) % board.width
+            holes.append(self.hole)
+        board.push_garbage(holes)
+    
+    def progress(self, board: Board) -> int:
+        return self.cleared
+    
+    def on_lock(self, board: Board, time_ns: int):
+        self.cleared += board.last_garbage_cleared
+        super().on_lock(board, time_ns)
+        if not self.finished:
+            self.refill(board)
+    
+    def status_text(self, board: Board) -> str:
+        return f"{self.title}: {max(0, self.goal - self.cleared)} left"
+
+class Survival(GameMode):
+    """Garbage rises from below on a timer that speeds up every 30 seconds.
+    
+    Messiness is the chance each row's hole moves: 0 gives one clean well,
+    1 a new column every row. Late levels push rows faster than anyone can
+    clear them, so the mode doubles as a stress test of the board and renderer.
+    """
+    name = "survival"
+    title = "Survival"
+    replayable = False  # the garbage isn't part of the replay format
+    
+    def __init__(self, level: int = 1, messiness: float = SURVIVAL_MESSINESS):
+        super().__init__()
+        self.start_level = level
+        self.messiness = messiness
+    
+    def start(self, board: Board):
+        super().start(board)
+        # Seeded from the piece sequence so a seed always gives the same garbage
+        self.rng = random.Random(board.sequence.seed)
+        self.hole = None
+        self.level = self.start_level
+        self.next_garbage_ns = self.interval_ns()
+    
+    def rate(self) -> float:
+        """Garbage rows per second at the current level"""
+        return SURVIVAL_BASE_RATE * SURVIVAL_RATE_GROWTH ** (self.level - 1)
+    
+    def interval_ns(self) -> int:
+        return max(1, int(1_000_000_000 / self.rate()))
+    
+    def tick(self, board: Board, time_ns: int):
+        self.level = self.start_level + time_ns // SURVIVAL_LEVEL_NS
+        if time_ns < self.next_garbage_ns:
+            return
+        
+        # Faster than one row per tick, several rows arrive at once
+        interval = self.interval_ns()
+        count = 1 + (time_ns - self.next_garbage_ns) // interval
+        self.next_garbage_ns += count * interval
+        
+        holes = []
+        for _ in range(count):
+            if self.hole is None or self.rng.random() < self.messiness:
+                self.hole = self.rng.randrange(board.width)
+            holes.append(self.hole)
+        board.push_garbage(holes)
+    
+    def status_text(self, board: Board) -> str:
+        return f"{self.title} L{self.level}: {self.rate():.1f}/s"
+    
+    def breakdown(self, board: Board, time_ns: int) -> List[str]:
+        return super().breakdown(board, time_ns) + [f"Level {self.level}  Lines {board.lines_cleared}"]
+
+MODES = {mode.name: mode for mode in (GameMode, Sprint, Ultra, CheeseRace, Survival)}
@@ -0,0 +1,129 @@
+import gzip
+import json
+import os
+import time
+import getpass
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from tetris_main import Board, BoardSnapshot, SpinType, BOARD_WIDTH, TOTAL_HEIGHT
+
+# A replay is one JSON object per line of an archive (.jsonl or .jsonl.gz):
+#   {"version", "player", "seed", "randomizer", "width", "height", "started",
+#    "game_over", "placements": [[time_ms, type, rotation, x, y, held, spin], ...]}
+# Placements are where each piece locked, so replaying them through Board with
+# the same seeded sequence reproduces the game.
+REPLAY_VERSION = 1
+ARCHIVE_SUFFIXES = (".jsonl", ".jsonl.gz")
+
+class ReplayError(Exception):
+    pass
+
+class ReplayStep(NamedTuple):
+    time_ms: int
+    before: BoardSnapshot
+    placement: Tuple[str, int, int, int, bool]  # (type, rotation, x, y, held)
+    spin: SpinType
+    lines: int
+    attack: int
+
+class ReplayRecorder:
+    """Collects placements from a Board and appends finished games to an archive"""
+    def __init__(self, directory: str, player: Optional[str] = None):
+        self.directory = directory
+        self.player = player or getpass.getuser()
+        self.replay = None
+    
+    def start(self, board: Board):
+        self.replay = {
+            "version": REPLAY_VERSION,
+            "player": self.player,
+            "seed": board.sequence.seed,
+            "randomizer": board.sequence.randomizer,
+            "width": board.width,
+            "height": board.height,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "game_over": False,
+            "placements": []
+        }
+    
+    def record(self, board: Board, time_ms: float):
+        if self.replay is not None:
+            piece_type, rotation, x, y, held = board.last_placement
+            self.replay["placements"].append([int(time_ms), piece_type, rotation, x, y, held,
+                                              board.last_spin.value])
+    
+    def finish(self, board: Board):
+        """Write the game out, once, if any piece was placed"""
+        if self.replay is None or not self.replay["placements"]:
+            self.replay = None
+            return
+        
+        self.replay["game_over"] = board.game_over
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"replays-{time.strftime('%Y-%m-%d')}.jsonl")
+        with open(path, 'a') as f:
+            f.write(json.dumps(self.replay, separators=(",", ":")) + "\n")
+        self.replay = None
+
+def archive_paths(paths: List[str]) -> List[str]:
+    """Expand directories into the replay archives they contain"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith(ARCHIVE_SUFFIXES):
+                    found.append(os.path.join(path, name))
+        else:
+            found.append(path)
+    return found
+
+def iter_replays(path: str) -> Iterator[Dict]:
+    """Stream the replays of one archive without loading the whole file"""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, 'rt') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def replay_board(replay: Dict) -> Board:
+    """A fresh Board with the replay's seed, randomizer and size"""
+    return Board(seed=replay["seed"], randomizer=replay["randomizer"],
+                 width=replay.get("width", BOARD_WIDTH), height=replay.get("height", TOTAL_HEIGHT))
+
+def simulate(replay: Dict, board: Optional[Board] = None) -> Iterator[ReplayStep]:
+    """Re-play a replay's placements, one step per piece.
+    
+    Pass a board from replay_board() to see its state after each step.
+    """
+    if board is None:
+        board = replay_board(replay)
+    
+    for placement in replay["placements"]:
+        time_ms, piece_type, rotation, x, y, held = placement[:6]
+        # The spin was judged live from the rotations that led here
+        spin = SpinType(placement[6]) if len(placement) > 6 else SpinType.NONE
+        before = board.snapshot()
+        
+        if held:
+            board.hold()
+        
+        piece = board.current_piece
+        if board.game_over or piece.type != piece_type:
+            raise ReplayError(f"Replay out of sync at piece {board.pieces_placed + 1}")
+        
+        piece.rotation = rotation
+        piece.x = x
+        piece.y = y
+        
+        lines_before = board.lines_cleared
+        attack_before = board.attack_sent
+        board.lock_piece(spin)
+        
+        yield ReplayStep(
+            time_ms=time_ms,
+            before=before,
+            placement=(piece_type, rotation, x, y, held),
+            spin=spin,
+            lines=board.lines_cleared - lines_before,
+            attack=board.attack_sent - attack_before
+        )
@@ -2,11 +2,11 @@ import pygame
 import json
 import sys
 from dataclasses import dataclass
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from enum import Enum
 
 # Import from main game
-from tetris_main import Settings, InputKey, SCREEN_WIDTH, SCREEN_HEIGHT
+from tetris_main import Settings, InputKey, SCREEN_WIDTH, SCREEN_HEIGHT, get_font
 
 # Colors
 BLACK = (0, 0, 0)
@@ -18,20 +18,41 @@ GREEN = (0, 255, 0)
 RED = (255, 0, 0)
 BLUE = (100, 100, 255)
 
+MENU_ROWS = 11  # options shown at once; the list scrolls to keep the selection in view
+BACKDROP_ALPHA = 224  # how much of the game behind an in-game menu is hidden
+
 class SettingsMenu:
-    def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Tetris Settings Configuration")
+    """Settings editor; standalone it opens its own window, in a launcher it
+    draws over the game on the shared display and edits the game's Settings"""
+    def __init__(self, screen: Optional[pygame.Surface] = None, settings: Optional[Settings] = None,
+                 background: Optional[pygame.Surface] = None):
+        if screen is None:
+            pygame.init()
+            screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+            pygame.display.set_caption("Tetris Settings Configuration")
+        self.screen = screen
         
         self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 32)
-        self.small_font = pygame.font.Font(None, 24)
+        self.font = get_font(32)
+        self.small_font = get_font(24)
+        
+        if settings is None:
+            settings = Settings()
+            settings.load()
+        self.settings = settings
         
-        self.settings = Settings()
-        self.settings.load()
+        # The frame underneath, dimmed once here rather than every frame
+        self.backdrop = None
+        if background is not None:
+            self.backdrop = background.copy()
+            shade = pygame.Surface(self.backdrop.get_size())
+            shade.set_alpha(BACKDROP_ALPHA)
+            shade.fill(BLACK)
+            self.backdrop.blit(shade, (0, 0))
         
         self.running = True
+        self.dt = 0
+        self.scroll = 0
         self.selected_option = 0
         self.editing_keybind = None
         self.message = ""
@@ -55,6 +76,9 @@ class SettingsMenu:
             ("Hold", InputKey.HOLD),
             ("Pause", InputKey.PAUSE),
             ("Restart", InputKey.RESTART),
+            ("Undo (Practice)", InputKey.UNDO),
+            ("Redo (Practice)", InputKey.REDO),
+            ("Settings Menu", InputKey.SETTINGS),
             ("", None, 0, 0, 0),  # Separator
             ("Save Settings", "save"),
             ("Reset to Default", "reset"),
@@ -120,19 +144,25 @@ class SettingsMenu:
         self.message_timer = duration
     
     def draw(self):
-        self.screen.fill(BLACK)
+        if self.backdrop:
+            self.screen.blit(self.backdrop, (0, 0))
+        else:
+            self.screen.fill(BLACK)
         
         # Title
         title = self.font.render("SETTINGS CONFIGURATION", True, WHITE)
         title_rect = title.get_rect(centerx=SCREEN_WIDTH // 2, y=30)
         self.screen.blit(title, title_rect)
         
-        # Draw options
+        # Draw options, scrolled so the selected one is in view; separators
+        # take no space
+        rows = [i for i, option in enumerate(self.options) if option[1] is not None]
+        position = rows.index(self.selected_option)
+        self.scroll = min(max(self.scroll, position - MENU_ROWS + 1), position)
         y_offset = 100
         
-        for i, option in enumerate(self.options):
-            if option[1] is None:  # Separator
-                continue
+        for i in rows[self.scroll:self.scroll + MENU_ROWS]:
+            option = self.options[i]
             
             # Highlight selected option
             if i == self.selected_option:
@@ -167,10 +197,13 @@ class SettingsMenu:
                 self.screen.blit(value_rendered, value_rect)
             
             elif isinstance(option[1], InputKey):  # Keybind option
-                key_code = self.settings.keybinds[option[1]]
-                key_name = self.get_key_name(key_code)
+                key_codes = self.settings.keybinds[option[1]]
+                key_name = " / ".join(self.get_key_name(code) for code in key_codes)
                 
-                if i == self.selected_option and self.editing_keybind:
+                if i == self.selected_option and self.editing_keybind == "add":
+                    key_text = "Press a key to add..."
+                    color = RED
+                elif i == self.selected_option and self.editing_keybind:
                     key_text = "Press any key..."
                     color = RED
                 else:
@@ -194,7 +227,7 @@ class SettingsMenu:
         # Draw message
         if self.message and self.message_timer > 0:
             msg_rendered = self.font.render(self.message, True, GREEN)
-            msg_rect = msg_rendered.get_rect(centerx=SCREEN_WIDTH // 2, y=550)
+            msg_rect = msg_rendered.get_rect(centerx=SCREEN_WIDTH // 2, y=65)
             self.screen.blit(msg_rendered, msg_rect)
         
         # Instructions
@@ -202,79 +235,96 @@ class SettingsMenu:
             "↑/↓ - Navigate",
             "←/→ - Change values",
             "ENTER - Edit keybind / Select action",
+            "SHIFT+ENTER - Add another key to an action",
             "ESC - Cancel"
         ]
         
-        y = 500
+        y = 485
         for instruction in instructions:
             text = self.small_font.render(instruction, True, LIGHT_GRAY)
             self.screen.blit(text, (50, y))
-            y += 25
+            y += 22
         
         pygame.display.flip()
     
-    def run(self):
-        while self.running:
-            dt = self.clock.tick(60)
-            
-            # Update message timer
-            if self.message_timer > 0:
-                self.message_timer -= dt
-                if self.message_timer <= 0:
-                    self.message = ""
+    def poll_events(self) -> List[pygame.event.Event]:
+        self.dt = self.clock.tick(60)
+        return pygame.event.get()
+    
+    def frame(self, events: List[pygame.event.Event]):
+        # Update message timer
+        if self.message_timer > 0:
+            self.message_timer -= self.dt
+            if self.message_timer <= 0:
+                self.message = ""
+        
+        for event in events:
+            if event.type == pygame.QUIT:
+                self.running = False
             
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                
-                elif event.type == pygame.KEYDOWN:
-                    if self.editing_keybind:
-                        # Assign new keybind
-                        if event.key != pygame.K_ESCAPE:
-                            option = self.options[self.selected_option]
-                            input_key = option[1]
-                            
-                            # Check for conflicts
-                            conflict = False
-                            for key, code in self.settings.keybinds.items():
-                                if code == event.key and key != input_key:
-                                    self.show_message(f"Key already used for {key.value}")
-                                    conflict = True
-                                    break
-                            
-                            if not conflict:
-                                self.settings.keybinds[input_key] = event.key
-                                self.show_message("Keybind updated!")
+            elif event.type == pygame.KEYDOWN:
+                if self.editing_keybind:
+                    # Assign new keybind
+                    if event.key != pygame.K_ESCAPE:
+                        option = self.options[self.selected_option]
+                        input_key = option[1]
                         
-                        self.editing_keybind = False
+                        # Check for conflicts
+                        conflict = False
+                        for key, codes in self.settings.keybinds.items():
+                            if event.key in codes and key != input_key:
+                                self.show_message(f"Key already used for {key.value}")
+                                conflict = True
+                                break
+                        
+                        if not conflict:
+                            codes = self.settings.keybinds[input_key]
+                            if self.editing_keybind == "add":
+                                if event.key not in codes:
+                                    self.settings.bind(input_key, codes + [event.key])
+                                self.show_message("Key added!")
+                            else:
+                                self.settings.bind(input_key, [event.key])
+                                self.show_message("Keybind updated!")
                     
-                    else:
-                        if event.key == pygame.K_UP:
-                            self.handle_navigation(-1)
-                        elif event.key == pygame.K_DOWN:
-                            self.handle_navigation(1)
-                        elif event.key == pygame.K_LEFT:
-                            self.handle_value_change(-1)
-                        elif event.key == pygame.K_RIGHT:
-                            self.handle_value_change(1)
-                        elif event.key == pygame.K_RETURN:
-                            option = self.options[self.selected_option]
-                            
-                            if isinstance(option[1], InputKey):
-                                self.editing_keybind = True
-                            elif option[1] == "save":
-                                self.settings.save()
-                                self.show_message("Settings saved!")
-                            elif option[1] == "reset":
-                                self.settings = Settings()
-                                self.show_message("Settings reset to default!")
-                            elif option[1] == "exit":
-                                self.running = False
-                        elif event.key == pygame.K_ESCAPE:
+                    self.editing_keybind = None
+                
+                else:
+                    if event.key == pygame.K_UP:
+                        self.handle_navigation(-1)
+                    elif event.key == pygame.K_DOWN:
+                        self.handle_navigation(1)
+                    elif event.key == pygame.K_LEFT:
+                        self.handle_value_change(-1)
+                    elif event.key == pygame.K_RIGHT:
+                        self.handle_value_change(1)
+                    elif event.key == pygame.K_RETURN:
+                        option = self.options[self.selected_option]
+                        
+                        if isinstance(option[1], InputKey):
+                            # Shift+Enter adds a key instead of replacing them all
+                            self.editing_keybind = "add" if event.mod & pygame.KMOD_SHIFT else "replace"
+                        elif option[1] == "save":
+                            self.settings.save()
+                            self.show_message("Settings saved!")
+                        elif option[1] == "reset":
+                            self.settings.reset()
+                            self.show_message("Settings reset to default!")
+                        elif option[1] == "exit":
                             self.running = False
-            
-            self.draw()
+                    elif event.key == pygame.K_ESCAPE:
+                        self.running = False
+        
+        self.draw()
+    
+    def close(self):
+        pass
+    
+    def run(self):
+        while self.running:
+            self.frame(self.poll_events())
         
+        get_font.cache_clear()
         pygame.quit()
 
 if __name__ == "__main__":
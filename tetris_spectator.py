@@ -0,0 +1,334 @@
+import os
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import asyncio
+import struct
+import threading
+import argparse
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from tetris_main import Board, PIECE_TYPES, PIECE_COLORS, GARBAGE_COLOR, NEXT_PREVIEW
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 7400
+CLIENT_QUEUE = 64  # messages a viewer may fall behind by before it is resynced
+
+# Wire format: every message is a little-endian u32 length and a payload
+# starting with HEADER. A keyframe carries the board size and then every
+# section; a delta carries a flags byte and only the sections it names.
+KEYFRAME = 0
+DELTA = 1
+
+ROWS = 1
+PIECE = 2
+HOLD = 4
+QUEUE_SHIFT = 8  # queue moved up by one; only the new last piece is sent
+QUEUE = 16
+COUNTERS = 32
+
+# Row ops: an empty row, the row's cells, or a copy of the row that was at
+# another height in the previous state (what a line clear does to the stack)
+ROW_EMPTY = 0
+ROW_CELLS = 1
+ROW_COPY = 2
+
+LENGTH = struct.Struct("<I")
+HEADER = struct.Struct("<BBI")  # message type, board channel, time ms
+SIZE = struct.Struct("<HH")  # width, height
+FLAGS = struct.Struct("<B")
+ROW_COUNT = struct.Struct("<H")
+ROW_OP = struct.Struct("<HB")  # y, op
+ROW_SOURCE = struct.Struct("<H")
+PIECE_STATE = struct.Struct("<BhhB")  # piece code, x, y, rotation
+HOLD_STATE = struct.Struct("<BB")  # piece code, can hold
+COUNTER_STATE = struct.Struct("<IIHIIHhB")  # score, lines, level, pieces, attack, b2b, combo, game over
+
+# 0 for none, then IOTSZJL, then garbage
+PIECE_CODES = {piece_type: i + 1 for i, piece_type in enumerate(PIECE_TYPES)}
+CELL_CODES = {None: 0, GARBAGE_COLOR: len(PIECE_TYPES) + 1,
+              **{PIECE_COLORS[piece_type]: code for piece_type, code in PIECE_CODES.items()}}
+
+class View(NamedTuple):
+    """What viewers see of a board; rows are shared with the board, not copied"""
+    rows: Tuple[tuple, ...]
+    piece: Optional[Tuple[str, int, int, int]]  # (type, x, y, rotation)
+    hold: Optional[str]
+    can_hold: bool
+    queue: Tuple[str, ...]
+    counters: Tuple[int, ...]
+
+def board_view(board: Board) -> View:
+    piece = board.current_piece
+    return View(
+        rows=tuple(board.rows),
+        piece=(piece.type, piece.x, piece.y, piece.rotation) if piece else None,
+        hold=board.hold_piece,
+        can_hold=board.can_hold,
+        queue=tuple(board.next_pieces),
+        counters=(board.score, board.lines_cleared, board.level, board.pieces_placed, board.attack_sent,
+                  board.b2b_count, board.combo_count, board.game_over)
+    )
+
+@lru_cache(maxsize=4096)
+def encode_cells(row: tuple) -> bytes:
+    return bytes(CELL_CODES[cell] for cell in row)
+
+def encode_rows(rows: Tuple[tuple, ...], previous: Optional[Tuple[tuple, ...]]) -> bytes:
+    """Ops for the rows that changed; rows are compared by identity"""
+    ops = []
+    old_index = None
+    for y, row in enumerate(rows):
+        if previous is not None and row is previous[y]:
+            continue
+        
+        if not any(row):
+            ops.append(ROW_OP.pack(y, ROW_EMPTY))
+            continue
+        
+        if previous is not None:
+            if old_index is None:
+                old_index = {id(old): old_y for old_y, old in enumerate(previous)}
+            source = old_index.get(id(row))
+            if source is not None:
+                ops.append(ROW_OP.pack(y, ROW_COPY) + ROW_SOURCE.pack(source))
+                continue
+        
+        ops.append(ROW_OP.pack(y, ROW_CELLS) + encode_cells(row))
+    return ROW_COUNT.pack(len(ops)) + b"".join(ops)
+
+def encode(channel: int, view: View, time_ms: int, previous: Optional[View] = None) -> bytes:
+    """A delta from previous, or a keyframe when there is no previous view to diff against"""
+    if previous is not None and (len(previous.rows), len(previous.rows[0])) != (len(view.rows), len(view.rows[0])):
+        previous = None
+    
+    flags = 0
+    sections = []
+    if previous is None or view.rows != previous.rows:
+        flags |= ROWS
+        sections.append(encode_rows(view.rows, previous and previous.rows))
+    if previous is None or view.piece != previous.piece:
+        flags |= PIECE
+        piece_type, x, y, rotation = view.piece or (None, 0, 0, 0)
+        sections.append(PIECE_STATE.pack(PIECE_CODES.get(piece_type, 0), x, y, rotation))
+    if previous is None or (view.hold, view.can_hold) != (previous.hold, previous.can_hold):
+        flags |= HOLD
+        sections.append(HOLD_STATE.pack(PIECE_CODES.get(view.hold, 0), view.can_hold))
+    if previous is not None and view.queue[:-1] == previous.queue[1:]:
+        if view.queue != previous.queue:
+            flags |= QUEUE_SHIFT
+            sections.append(bytes([PIECE_CODES[view.queue[-1]]]))
+    else:
+        flags |= QUEUE
+        sections.append(bytes(PIECE_CODES[piece_type] for piece_type in view.queue))
+    if previous is None or view.counters != previous.counters:
+        flags |= COUNTERS
+        sections.append(COUNTER_STATE.pack(*view.counters))
+    
+    if previous is None:
+        head = HEADER.pack(KEYFRAME, channel, time_ms) + SIZE.pack(len(view.rows[0]), len(view.rows))
+    else:
+        head = HEADER.pack(DELTA, channel, time_ms) + FLAGS.pack(flags)
+    payload = head + b"".join(sections)
+    return LENGTH.pack(len(payload)) + payload
+
+class Viewer:
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.queue = asyncio.Queue()
+        self.resyncs = 0
+        self.task = asyncio.current_task()
+
+class SpectatorServer:
+    """Broadcasts live boards to TCP viewers from an event loop on its own thread.
+    
+    The game thread only takes a cheap view of the board and hands it over;
+    diffing, encoding and sending happen on the server thread. A viewer that
+    falls CLIENT_QUEUE messages behind has its backlog dropped and gets fresh
+    keyframes, so a slow viewer costs memory only up to that bound.
+    """
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="spectator-server", daemon=True)
+        self.thread.start()
+        
+        # Latest (view, time ms) per channel, owned by the server thread
+        self.views: Dict[int, Tuple[View, int]] = {}
+        self.viewers = set()
+        # Last view handed over per channel, owned by the game thread
+        self.published: Dict[int, View] = {}
+        
+        try:
+            self.server = asyncio.run_coroutine_threadsafe(
+                asyncio.start_server(self._serve, host, port), self.loop).result()
+        except OSError:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop.close()
+            raise
+        self.port = self.server.sockets[0].getsockname()[1]
+    
+    def publish(self, channel: int, board: Board, time_ns: int):
+        """Send a board's changes to viewers; called from the game thread, never blocks"""
+        view = board_view(board)
+        if view == self.published.get(channel):
+            return
+        self.published[channel] = view
+        self.loop.call_soon_threadsafe(self._broadcast, channel, view, time_ns // 1_000_000)
+    
+    def keyframes(self) -> List[bytes]:
+        return [encode(channel, view, time_ms) for channel, (view, time_ms) in self.views.items()]
+    
+    def _broadcast(self, channel: int, view: View, time_ms: int):
+        previous = self.views.get(channel)
+        self.views[channel] = (view, time_ms)
+        if not self.viewers:
+            return
+        
+        message = encode(channel, view, time_ms, previous and previous[0])
+        for viewer in self.viewers:
+            if viewer.queue.qsize() < CLIENT_QUEUE:
+                viewer.queue.put_nowait(message)
+                continue
+            
+            # Too far behind to catch up; start it over from the current state
+            while not viewer.queue.empty():
+                viewer.queue.get_nowait()
+            for keyframe in self.keyframes():
+                viewer.queue.put_nowait(keyframe)
+            viewer.resyncs += 1
+    
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        viewer = Viewer(writer)
+        for keyframe in self.keyframes():
+            viewer.queue.put_nowait(keyframe)
+        self.viewers.add(viewer)
+        
+        try:
+            while True:
+                writer.write(await viewer.queue.get())
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.viewers.discard(viewer)
+            writer.close()
+    
+    async def _shutdown(self):
+        self.server.close()
+        tasks = [viewer.task for viewer in self.viewers]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.server.wait_closed()
+    
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+class SpectatedBoard:
+    """A viewer's copy of one board, kept up to date by applying messages"""
+    def __init__(self):
+        self.width = 0
+        self.rows: List[bytes] = []
+        self.piece: Optional[Tuple[str, int, int, int]] = None
+        self.hold: Optional[str] = None
+        self.can_hold = True
+        self.queue: List[str] = []
+        self.counters: Dict[str, int] = {}
+        self.time_ms = 0
+    
+    def apply(self, payload: bytes, offset: int):
+        """Apply a message body, starting after its header"""
+        message_type = payload[0]
+        if message_type == KEYFRAME:
+            self.width, height = SIZE.unpack_from(payload, offset)
+            self.rows = [bytes(self.width)] * height
+            offset += SIZE.size
+            flags = ROWS | PIECE | HOLD | QUEUE | COUNTERS
+        else:
+            flags, = FLAGS.unpack_from(payload, offset)
+            offset += FLAGS.size
+        
+        if flags & ROWS:
+            previous = self.rows
+            self.rows = list(previous)
+            count, = ROW_COUNT.unpack_from(payload, offset)
+            offset += ROW_COUNT.size
+            for _ in range(count):
+                y, op = ROW_OP.unpack_from(payload, offset)
+                offset += ROW_OP.size
+                if op == ROW_EMPTY:
+                    self.rows[y] = bytes(self.width)
+                elif op == ROW_COPY:
+                    source, = ROW_SOURCE.unpack_from(payload, offset)
+                    offset += ROW_SOURCE.size
+                    self.rows[y] = previous[source]
+                else:
+                    self.rows[y] = payload[offset:offset + self.width]
+                    offset += self.width
+        if flags & PIECE:
+            code, x, y, rotation = PIECE_STATE.unpack_from(payload, offset)
+            offset += PIECE_STATE.size
+            self.piece = (PIECE_TYPES[code - 1], x, y, rotation) if code else None
+        if flags & HOLD:
+            code, can_hold = HOLD_STATE.unpack_from(payload, offset)
+            offset += HOLD_STATE.size
+            self.hold = PIECE_TYPES[code - 1] if code else None
+            self.can_hold = bool(can_hold)
+        if flags & QUEUE_SHIFT:
+            self.queue = self.queue[1:] + [PIECE_TYPES[payload[offset] - 1]]
+            offset += 1
+        if flags & QUEUE:
+            self.queue = [PIECE_TYPES[code - 1] for code in payload[offset:offset + NEXT_PREVIEW]]
+            offset += NEXT_PREVIEW
+        if flags & COUNTERS:
+            values = COUNTER_STATE.unpack_from(payload, offset)
+            self.counters = dict(zip(("score", "lines", "level", "pieces", "attack", "b2b", "combo",
+                                      "game_over"), values))
+
+async def watch(host: str, port: int, show_board: bool = False):
+    """Print every update from a spectator server"""
+    reader, writer = await asyncio.open_connection(host, port)
+    boards: Dict[int, SpectatedBoard] = {}
+    received = 0
+    
+    try:
+        while True:
+            length, = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+            payload = await reader.readexactly(length)
+            received += LENGTH.size + length
+            
+            message_type, channel, time_ms = HEADER.unpack_from(payload)
+            board = boards.setdefault(channel, SpectatedBoard())
+            board.apply(payload, HEADER.size)
+            board.time_ms = time_ms
+            
+            counters = board.counters
+            kind = "key" if message_type == KEYFRAME else "delta"
+            print(f"[{channel}] {time_ms / 1000:8.3f}s {kind:>5} {length + LENGTH.size:>4}B  "
+                  f"pieces {counters['pieces']}  lines {counters['lines']}  score {counters['score']:,}  "
+                  f"next {''.join(board.queue)}  ({received:,}B total)")
+            if show_board:
+                # Top row first, skipping the empty rows above the stack
+                stack = [row for row in board.rows if any(row)]
+                for row in reversed(stack):
+                    print("  " + "".join("#" if cell else "." for cell in row))
+    except asyncio.IncompleteReadError:
+        print("Server closed the connection")
+    finally:
+        writer.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch a game streamed with --spectate")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--board", action="store_true", help="Print the stack after every update")
+    args = parser.parse_args()
+    
+    try:
+        asyncio.run(watch(args.host, args.port, args.board))
+    except (ConnectionRefusedError, KeyboardInterrupt):
+        pass
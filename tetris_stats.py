@@ -0,0 +1,109 @@
+from array import array
+from typing import List, Tuple
+
+DEFAULT_WINDOW = 10.0  # seconds
+DEFAULT_CAPACITY = 4096  # pieces kept
+LATENCY_BIN_MS = 50
+LATENCY_BINS = 40  # last bin also counts anything slower
+
+class StatsRecorder:
+    """Per-piece events in a fixed-size ring buffer with rolling-window rates.
+    
+    The window keeps running sums and a start index that only moves forward,
+    so each update costs O(1) amortized and nothing is allocated after
+    construction.
+    """
+    def __init__(self, window: float = DEFAULT_WINDOW, capacity: int = DEFAULT_CAPACITY):
+        self.window = window
+        self.capacity = capacity
+        
+        # Event columns
+        self.times = array('d', [0.0]) * capacity
+        self.lines = array('H', [0]) * capacity
+        self.attack = array('H', [0]) * capacity
+        self.garbage = array('H', [0]) * capacity
+        self.spins = array('B', [0]) * capacity
+        self.combos = array('H', [0]) * capacity
+        
+        self.latency_bins = array('L', [0]) * LATENCY_BINS
+        self.reset(0.0)
+    
+    def reset(self, now: float):
+        self.start_time = now
+        self.last_time = now
+        self.total = 0  # events ever recorded; the newest is at (total - 1) % capacity
+        self.window_start = 0  # oldest event still in the window
+        
+        self.window_attack = 0
+        self.window_garbage = 0
+        self.window_lines = 0
+        
+        for i in range(LATENCY_BINS):
+            self.latency_bins[i] = 0
+    
+    def snapshot(self) -> Tuple:
+        """Counters to restore() later; events recorded after it are just left in the ring"""
+        return (self.start_time, self.last_time, self.total, self.window_start, self.window_attack,
+                self.window_garbage, self.window_lines, array('L', self.latency_bins))
+    
+    def restore(self, snapshot: Tuple):
+        """Rewind to a snapshot(), as long as fewer than capacity events were recorded since"""
+        (self.start_time, self.last_time, self.total, self.window_start, self.window_attack,
+         self.window_garbage, self.window_lines, latency_bins) = snapshot
+        self.latency_bins[:] = latency_bins
+    
+    def record(self, now: float, lines: int, attack: int, garbage: int = 0, spin: int = 0, combo: int = 0):
+        """Add one placed piece; spin is a small code (0 for none)"""
+        # Never let the ring overwrite an event that is still counted
+        if self.total - self.window_start >= self.capacity:
+            self._drop_oldest()
+        
+        i = self.total % self.capacity
+        self.times[i] = now
+        self.lines[i] = lines
+        self.attack[i] = attack
+        self.garbage[i] = garbage
+        self.spins[i] = spin
+        self.combos[i] = combo
+        self.total += 1
+        
+        self.window_lines += lines
+        self.window_attack += attack
+        self.window_garbage += garbage
+        
+        latency_ms = (now - self.last_time) * 1000
+        self.latency_bins[min(int(latency_ms // LATENCY_BIN_MS), LATENCY_BINS - 1)] += 1
+        self.last_time = now
+        
+        self._expire(now)
+    
+    def _drop_oldest(self):
+        i = self.window_start % self.capacity
+        self.window_lines -= self.lines[i]
+        self.window_attack -= self.attack[i]
+        self.window_garbage -= self.garbage[i]
+        self.window_start += 1
+    
+    def _expire(self, now: float):
+        cutoff = now - self.window
+        while self.window_start < self.total and self.times[self.window_start % self.capacity] < cutoff:
+            self._drop_oldest()
+    
+    def rates(self, now: float) -> Tuple[float, float, float]:
+        """(PPS, APM, VS) over the last window seconds"""
+        self._expire(now)
+        
+        # Early in a game the window is only as long as the game so far
+        span = min(self.window, now - self.start_time)
+        if span <= 0:
+            return 0.0, 0.0, 0.0
+        
+        pieces = self.total - self.window_start
+        pps = pieces / span
+        apm = self.window_attack / span * 60
+        vs = (self.window_attack + self.window_garbage) / span * 100
+        return pps, apm, vs
+    
+    def latency_histogram(self) -> List[Tuple[int, int]]:
+        """(bin start in ms, pieces) for the time taken by each piece"""
+        return [(i * LATENCY_BIN_MS, count) for i, count in enumerate(self.latency_bins)]
@@ -0,0 +1,247 @@
+import os
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import json
+import math
+import random
+import shlex
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import ExitStack
+from itertools import combinations
+from typing import Dict, List, Optional
+
+from tetris_main import Board
+from tetris_bot import BotController, BotError, HeuristicBot
+
+DEFAULT_MAX_PIECES = 500
+
+def create_player(config: Dict):
+    """Bot from a config entry: {"name", "weights"} or {"name", "command"}"""
+    if "command" in config:
+        return BotController(shlex.split(config["command"]))
+    return HeuristicBot(config.get("weights"))
+
+def play_match(match: Dict, spectators=None) -> Dict:
+    """Play one versus game; both sides get the same seeded piece sequence.
+    
+    With a SpectatorServer, each side's board is streamed as channel 0 or 1.
+    A bot that fails ends the match with an "error" result instead of a winner.
+    """
+    seed = match["seed"]
+    boards = [Board(seed=seed), Board(seed=seed)]
+    players = []
+    garbage_rng = [random.Random(seed * 2 + side) for side in range(2)]
+    pending = [0, 0]
+    start_ns = time.perf_counter_ns()
+    
+    try:
+        for config in match["players"]:
+            players.append(create_player(config))
+        for board, player in zip(boards, players):
+            player.start(board)
+        
+        while not any(board.game_over for board in boards):
+            if boards[0].pieces_placed >= match["max_pieces"]:
+                break
+            
+            for side, (board, player) in enumerate(zip(boards, players)):
+                lines_before = board.lines_cleared
+                attack_before = board.attack_sent
+                player.step()
+                
+                # Attack cancels our own incoming garbage first
+                attack = board.attack_sent - attack_before
+                cancelled = min(attack, pending[side])
+                pending[side] -= cancelled
+                pending[1 - side] += attack - cancelled
+                
+                # Garbage lands on placements that don't clear lines
+                if board.lines_cleared == lines_before and pending[side]:
+                    board.add_garbage(pending[side], garbage_rng[side].randrange(board.width))
+                    pending[side] = 0
+                
+                if spectators:
+                    spectators.publish(side, board, time.perf_counter_ns() - start_ns)
+    except BotError as e:
+        # Recorded, so a resumed tournament doesn't replay the failure
+        return {
+            "id": match["id"],
+            "seed": seed,
+            "players": [config["name"] for config in match["players"]],
+            "error": str(e)
+        }
+    finally:
+        for player in players:
+            player.close()
+    
+    # Top-outs decide the game; at the piece cap more attack wins
+    lost = [board.game_over for board in boards]
+    if lost[0] != lost[1]:
+        winner = 1 if lost[0] else 0
+    elif not any(lost) and boards[0].attack_sent != boards[1].attack_sent:
+        winner = 0 if boards[0].attack_sent > boards[1].attack_sent else 1
+    else:
+        winner = None
+    
+    return {
+        "id": match["id"],
+        "seed": seed,
+        "players": [config["name"] for config in match["players"]],
+        "winner": None if winner is None else match["players"][winner]["name"],
+        "pieces": [board.pieces_placed for board in boards],
+        "attack": [board.attack_sent for board in boards],
+        "lines": [board.lines_cleared for board in boards]
+    }
+
+def schedule(bots: List[Dict], games: int, seed: int, max_pieces: int) -> List[Dict]:
+    """Round robin where every pairing plays each seed twice, once from each side"""
+    matches = []
+    for a, b in combinations(bots, 2):
+        for game in range(games):
+            players = [a, b] if game % 2 == 0 else [b, a]
+            matches.append({
+                "id": f"{a['name']}|{b['name']}|{game}",
+                "seed": seed + game // 2,
+                "players": players,
+                "max_pieces": max_pieces
+            })
+    return matches
+
+def load_results(path: str) -> List[Dict]:
+    results = []
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                # A half-written last line means we were interrupted mid-write
+                if line:
+                    try:
+                        results.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        pass
+    return results
+
+def run_tournament(bots: List[Dict], results_path: str, games: int, seed: int = 0,
+                   max_pieces: int = DEFAULT_MAX_PIECES, workers: Optional[int] = None,
+                   spectators=None) -> List[Dict]:
+    """Play every missing match across a process pool, appending results as they finish"""
+    results = load_results(results_path)
+    done = {result["id"] for result in results}
+    pending = [match for match in schedule(bots, games, seed, max_pieces) if match["id"] not in done]
+    
+    print(f"{len(done)} matches already played, {len(pending)} to go")
+    
+    with open(results_path, 'a') as f, ExitStack() as stack:
+        # Start on a fresh line if the last run died mid-write
+        if f.tell() > 0:
+            with open(results_path, 'rb') as existing:
+                existing.seek(-1, os.SEEK_END)
+                if existing.read(1) != b"\n":
+                    f.write("\n")
+        
+        if spectators:
+            # Streamed matches are played here, one at a time, so one server sees every board
+            played = (play_match(match, spectators) for match in pending)
+        else:
+            pool = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+            futures = [pool.submit(play_match, match) for match in pending]
+            # If anything else goes wrong, queued matches are cancelled on the
+            # way out instead of being played and thrown away
+            for future in futures:
+                stack.callback(future.cancel)
+            played = (future.result() for future in as_completed(futures))
+        
+        for i, result in enumerate(played, 1):
+            f.write(json.dumps(result) + "\n")
+            f.flush()
+            results.append(result)
+            if "error" in result:
+                print(f"Match {result['id']} failed: {result['error']}")
+            
+            if i % 100 == 0 or i == len(pending):
+                print(f"{i}/{len(pending)} matches played")
+    
+    return results
+
+def rating_table(results: List[Dict], iterations: int = 100) -> List[Dict]:
+    """Bradley-Terry ratings on the Elo scale, with draws counted as half wins"""
+    # Failed matches have no winner to count
+    results = [result for result in results if "error" not in result]
+    names = sorted({name for result in results for name in result["players"]})
+    wins = {name: 0.0 for name in names}
+    games = {(a, b): 0 for a in names for b in names}
+    record = {name: [0, 0, 0] for name in names}  # wins, losses, draws
+    
+    for result in results:
+        a, b = result["players"]
+        games[(a, b)] += 1
+        games[(b, a)] += 1
+        if result["winner"] is None:
+            wins[a] += 0.5
+            wins[b] += 0.5
+            record[a][2] += 1
+            record[b][2] += 1
+        else:
+            loser = b if result["winner"] == a else a
+            wins[result["winner"]] += 1
+            record[result["winner"]][0] += 1
+            record[loser][1] += 1
+    
+    # One virtual draw against an average player keeps winless bots finite
+    strength = {name: 1.0 for name in names}
+    for _ in range(iterations):
+        updated = {}
+        for name in names:
+            denominator = 1.0 / (strength[name] + 1.0)
+            for other in names:
+                if games[(name, other)]:
+                    denominator += games[(name, other)] / (strength[name] + strength[other])
+            updated[name] = (wins[name] + 0.5) / denominator
+        scale = math.exp(sum(math.log(s) for s in updated.values()) / len(names)) if names else 1.0
+        strength = {name: s / scale for name, s in updated.items()}
+    
+    table = [{
+        "name": name,
+        "rating": 1500 + 400 * math.log10(strength[name]),
+        "wins": record[name][0],
+        "losses": record[name][1],
+        "draws": record[name][2]
+    } for name in names]
+    table.sort(key=lambda row: row["rating"], reverse=True)
+    return table
+
+def print_rating_table(table: List[Dict]):
+    print(f"{'Bot':<24}{'Rating':>8}{'W':>7}{'L':>7}{'D':>7}")
+    for row in table:
+        print(f"{row['name']:<24}{row['rating']:>8.0f}{row['wins']:>7}{row['losses']:>7}{row['draws']:>7}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless bot-vs-bot tournament")
+    parser.add_argument("bots", help="JSON file with a list of bot configs")
+    parser.add_argument("--results", default="tournament_results.jsonl",
+                        help="Match results file; rerunning resumes from it")
+    parser.add_argument("--games", type=int, default=10, help="Games per pairing")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-pieces", type=int, default=DEFAULT_MAX_PIECES)
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: all cores)")
+    parser.add_argument("--spectate", metavar="PORT", type=int, nargs="?", const=7400,
+                        help="Stream boards to viewers on localhost, playing matches one at a time")
+    args = parser.parse_args()
+    
+    with open(args.bots, 'r') as f:
+        bots = json.load(f)
+    
+    spectators = None
+    if args.spectate is not None:
+        from tetris_spectator import SpectatorServer
+        spectators = SpectatorServer(port=args.spectate)
+    
+    try:
+        results = run_tournament(bots, args.results, args.games, args.seed, args.max_pieces, args.workers,
+                                 spectators)
+    finally:
+        if spectators:
+            spectators.close()
+    print_rating_table(rating_table(results))
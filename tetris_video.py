@@ -0,0 +1,215 @@
+import os
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import queue
+import shutil
+import subprocess
+import threading
+import argparse
+from itertools import islice
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import pygame
+
+from tetris_main import Game, Settings, BoardSnapshot, SCREEN_WIDTH, SCREEN_HEIGHT, SPIN_CODES
+from tetris_replay import ReplayError, iter_replays, replay_board, simulate
+
+DEFAULT_FPS = 60
+TAIL_SECONDS = 2.0  # final board held on screen after the last piece
+QUEUE_FRAMES = 32  # frames buffered between stages; bounds memory when a stage falls behind
+
+class VideoError(Exception):
+    pass
+
+class Frame(NamedTuple):
+    time_ns: int
+    board: BoardSnapshot
+    # (time_ns, lines, attack, spin code, combo) for each lock since the last frame
+    locks: List[Tuple[int, int, int, int, int]]
+
+_STOP = object()
+
+def frames(replay: Dict, fps: int, start: float = 0.0, end: Optional[float] = None) -> Iterator[Frame]:
+    """Re-simulate a replay and sample the board at every frame time in [start, end]"""
+    frame_ns = 1_000_000_000 // fps
+    start_ns = int(start * 1_000_000_000)
+    end_ns = None if end is None else int(end * 1_000_000_000)
+    
+    board = replay_board(replay)
+    time_ns = start_ns
+    lock_ns = 0
+    locks = []
+    
+    for step in simulate(replay, board):
+        lock_ns = step.time_ms * 1_000_000
+        # Until the lock, frames show the board as it was before it
+        while time_ns < lock_ns and (end_ns is None or time_ns <= end_ns):
+            yield Frame(time_ns, step.before, locks)
+            locks = []
+            time_ns += frame_ns
+        locks.append((lock_ns, step.lines, step.attack, SPIN_CODES[step.spin], board.combo_count))
+    
+    # Hold the final board for a moment
+    final = board.snapshot()
+    last_ns = lock_ns + int(TAIL_SECONDS * 1_000_000_000)
+    if end_ns is not None:
+        last_ns = min(last_ns, end_ns)
+    while time_ns <= last_ns:
+        yield Frame(time_ns, final, locks)
+        locks = []
+        time_ns += frame_ns
+
+class Stage(threading.Thread):
+    """Worker thread feeding each item of a bounded queue through a function.
+    
+    Results go to the next stage. A failure is kept and reported to whoever
+    puts the next item, so no stage blocks forever on a dead neighbour.
+    """
+    def __init__(self, name: str, work, next_stage: Optional["Stage"] = None):
+        super().__init__(name=name, daemon=True)
+        self.work = work
+        self.next_stage = next_stage
+        self.input = queue.Queue(maxsize=QUEUE_FRAMES)
+        self.error = None
+    
+    def put(self, item):
+        while True:
+            if self.error is not None or not self.is_alive():
+                raise VideoError(f"{self.name} stopped") from self.error
+            try:
+                self.input.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+    
+    def run(self):
+        try:
+            while True:
+                item = self.input.get()
+                if item is _STOP:
+                    break
+                result = self.work(item)
+                if self.next_stage:
+                    self.next_stage.put(result)
+        except BaseException as e:
+            self.error = e
+        finally:
+            if self.next_stage:
+                try:
+                    self.next_stage.put(_STOP)
+                except VideoError:
+                    pass
+    
+    def finish(self):
+        """Let queued items through, then wait for the thread"""
+        try:
+            self.put(_STOP)
+        except VideoError:
+            pass
+        self.join()
+
+class FrameRenderer:
+    """Draws frames with the game's own renderer onto an offscreen surface"""
+    def __init__(self, replay: Dict):
+        self.surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        board = replay_board(replay)
+        # Default settings, so the video doesn't depend on a local settings.json
+        self.game = Game(history_path=None, width=board.width, height=board.height, screen=self.surface,
+                         offscreen=True, settings=Settings())
+    
+    def render(self, frame: Frame) -> bytes:
+        game = self.game
+        for lock_ns, lines, attack, spin, combo in frame.locks:
+            game.stats.record(lock_ns / 1e9, lines, attack, 0, spin, combo)
+        
+        game.sim_time_ns = frame.time_ns
+        game.board.restore(frame.board)
+        game.render()
+        return pygame.image.tostring(self.surface, "RGB")
+
+class FfmpegSink:
+    """Pipes raw RGB frames to an ffmpeg process"""
+    def __init__(self, path: str, fps: int, codec: str = "libx264"):
+        ffmpeg = shutil.which("ffmpeg")
+        if not ffmpeg:
+            raise VideoError("ffmpeg not found; use --png to write a PNG sequence instead")
+        
+        self.process = subprocess.Popen([
+            ffmpeg, "-loglevel", "error", "-y",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{SCREEN_WIDTH}x{SCREEN_HEIGHT}", "-r", str(fps),
+            "-i", "-",
+            "-c:v", codec, "-pix_fmt", "yuv420p", path
+        ], stdin=subprocess.PIPE)
+    
+    def write(self, data: bytes):
+        self.process.stdin.write(data)
+    
+    def close(self):
+        self.process.stdin.close()
+        if self.process.wait() != 0:
+            raise VideoError(f"ffmpeg exited with status {self.process.returncode}")
+
+class PngSink:
+    """Writes every frame as a numbered PNG"""
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.count = 0
+    
+    def write(self, data: bytes):
+        surface = pygame.image.fromstring(data, (SCREEN_WIDTH, SCREEN_HEIGHT), "RGB")
+        pygame.image.save(surface, os.path.join(self.directory, f"frame_{self.count:06d}.png"))
+        self.count += 1
+    
+    def close(self):
+        pass
+
+def export_video(replay: Dict, sink, fps: int = DEFAULT_FPS, start: float = 0.0,
+                 end: Optional[float] = None) -> int:
+    """Render a replay into sink; simulation, drawing and encoding each get a thread"""
+    renderer = FrameRenderer(replay)
+    encoder = Stage("encoder", sink.write)
+    drawer = Stage("renderer", renderer.render, encoder)
+    encoder.start()
+    drawer.start()
+    
+    count = 0
+    try:
+        for frame in frames(replay, fps, start, end):
+            drawer.put(frame)
+            count += 1
+    except VideoError:
+        pass  # A stage died; its own error is raised below
+    finally:
+        drawer.finish()
+        encoder.join()
+        sink.close()
+    
+    # The stage that failed first, not the ones that stopped because of it
+    for stage in (encoder, drawer):
+        if stage.error is not None and not isinstance(stage.error, VideoError):
+            raise VideoError(f"{stage.name} failed: {stage.error}") from stage.error
+    return count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render a replay to video without a window")
+    parser.add_argument("archive", help="Replay archive (.jsonl or .jsonl.gz)")
+    parser.add_argument("--game", type=int, default=0, help="Index of the game in the archive")
+    parser.add_argument("--out", required=True, help="Video file, or a directory with --png")
+    parser.add_argument("--png", action="store_true", help="Write a PNG sequence instead of calling ffmpeg")
+    parser.add_argument("--fps", type=int, default=DEFAULT_FPS)
+    parser.add_argument("--start", type=float, default=0.0, help="Clip start in seconds")
+    parser.add_argument("--end", type=float, default=None, help="Clip end in seconds")
+    args = parser.parse_args()
+    
+    replay = next(islice(iter_replays(args.archive), args.game, None), None)
+    if replay is None:
+        parser.error(f"{args.archive} has no game {args.game}")
+    
+    try:
+        sink = PngSink(args.out) if args.png else FfmpegSink(args.out, args.fps)
+        count = export_video(replay, sink, args.fps, args.start, args.end)
+    except (VideoError, ReplayError) as e:
+        print(f"Export failed: {e}")
+        raise SystemExit(1)
+    print(f"Wrote {count} frames to {args.out}")